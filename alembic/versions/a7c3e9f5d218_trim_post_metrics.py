@@ -0,0 +1,38 @@
+"""trim post metrics to reactions and replies
+
+Revision ID: a7c3e9f5d218
+Revises: f6c2e8a4b139
+Create Date: 2025-03-31 09:41:17.264385
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9f5d218'
+down_revision = 'f6c2e8a4b139'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Из снимков убираются просмотры и пересылки, после чего снимки, отличавшиеся только ими,
+    # повторяют предыдущий снимок поста и удаляются
+    op.execute('UPDATE "PostMetricsSnapshots" SET metrics = metrics[1:2]')
+    op.execute(
+        """
+        DELETE FROM "PostMetricsSnapshots" AS s
+        USING (
+            SELECT channel_id, post_id, time,
+                   metrics = lag(metrics) OVER (PARTITION BY channel_id, post_id ORDER BY time) AS same
+            FROM "PostMetricsSnapshots"
+        ) AS d
+        WHERE d.same
+          AND s.channel_id = d.channel_id AND s.post_id = d.post_id AND s.time = d.time
+        """
+    )
+
+
+def downgrade() -> None:
+    # Удалённые просмотры и пересылки не восстановить, старые снимки дополняются нулями
+    op.execute('UPDATE "PostMetricsSnapshots" SET metrics = metrics || ARRAY[0, 0]')
@@ -0,0 +1,70 @@
+"""ensure_month_partition checks that the partition is attached
+
+Revision ID: b5e1d7f3a926
+Revises: a7c3e9f5d218
+Create Date: 2025-04-01 11:26:05.518402
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e1d7f3a926'
+down_revision = 'a7c3e9f5d218'
+branch_labels = None
+depends_on = None
+
+
+# Таблица месяца может остаться отключённой между DETACH и DROP при архивации.
+# Раньше функция видела её по имени и ничего не делала, а вставка падала с
+# "no partition of relation", теперь она явно сообщает об отключённой секции
+ENSURE_MONTH_PARTITION = """
+CREATE OR REPLACE FUNCTION ensure_month_partition(parent text, month timestamp) RETURNS void AS $$
+DECLARE
+    start timestamp := date_trunc('month', month);
+    name text := format('%s_%s', parent, to_char(start, 'YYYY_MM'));
+    child regclass := to_regclass(format('%I', name));
+BEGIN
+    IF child IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            name, parent, start, start + interval '1 month'
+        );
+    ELSIF NOT EXISTS (
+        SELECT 1 FROM pg_inherits
+        WHERE inhrelid = child AND inhparent = to_regclass(format('%I', parent))
+    ) THEN
+        RAISE EXCEPTION 'Секция % отключена от % для архивации', name, parent
+            USING ERRCODE = 'object_not_in_prerequisite_state';
+    END IF;
+EXCEPTION WHEN duplicate_table OR unique_violation THEN
+    NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+PREVIOUS_ENSURE_MONTH_PARTITION = """
+CREATE OR REPLACE FUNCTION ensure_month_partition(parent text, month timestamp) RETURNS void AS $$
+DECLARE
+    start timestamp := date_trunc('month', month);
+    name text := format('%s_%s', parent, to_char(start, 'YYYY_MM'));
+BEGIN
+    IF to_regclass(format('%I', name)) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            name, parent, start, start + interval '1 month'
+        );
+    END IF;
+EXCEPTION WHEN duplicate_table OR unique_violation THEN
+    NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    op.execute(ENSURE_MONTH_PARTITION)
+
+
+def downgrade() -> None:
+    op.execute(PREVIOUS_ENSURE_MONTH_PARTITION)
@@ -0,0 +1,160 @@
+"""partition posts and comments
+
+Revision ID: c5f19e2a7b64
+Revises: a7e3d5b91c28
+Create Date: 2025-03-24 11:05:26.417302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f19e2a7b64'
+down_revision = 'a7e3d5b91c28'
+branch_labels = None
+depends_on = None
+
+
+POSTS_COLUMNS = 'channel_id, post_id, channel_name, url, text, media, time, reactions, replies_count, replies_max_id'
+COMMENTS_COLUMNS = 'channel_id, id, post_id, text, user_id, time'
+
+# Создаёт месячную секцию parent_YYYY_MM, если её ещё нет. Параллельное создание
+# одной и той же секции несколькими воркерами не считается ошибкой.
+ENSURE_MONTH_PARTITION = """
+CREATE OR REPLACE FUNCTION ensure_month_partition(parent text, month timestamp) RETURNS void AS $$
+DECLARE
+    start timestamp := date_trunc('month', month);
+    name text := format('%s_%s', parent, to_char(start, 'YYYY_MM'));
+BEGIN
+    IF to_regclass(format('%I', name)) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            name, parent, start, start + interval '1 month'
+        );
+    END IF;
+EXCEPTION WHEN duplicate_table OR unique_violation THEN
+    NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def posts_columns() -> list:
+    return [
+        sa.Column('channel_id', sa.BigInteger(), nullable=False),
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('channel_name', sa.String(), nullable=True),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('text', sa.String(), nullable=False),
+        sa.Column('media', sa.String(), nullable=False),
+        sa.Column('time', sa.DateTime(), nullable=False),
+        sa.Column('reactions', sa.String(), nullable=True),
+        sa.Column('replies_count', sa.Integer(), nullable=True),
+        sa.Column('replies_max_id', sa.Integer(), nullable=True),
+    ]
+
+
+def comments_columns() -> list:
+    return [
+        sa.Column('channel_id', sa.BigInteger(), nullable=False),
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('text', sa.String(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('time', sa.DateTime(), nullable=False),
+    ]
+
+
+def create_indexes() -> None:
+    op.create_index('ix_Posts_time_channel_id_post_id', 'Posts', ['time', 'channel_id', 'post_id'], unique=False)
+    op.create_index('ix_Posts_channel_id_time', 'Posts', ['channel_id', 'time'], unique=False)
+    op.create_index('ix_Posts_channel_name_time', 'Posts', ['channel_name', 'time'], unique=False)
+    op.create_index('ix_Comments_channel_id_post_id_time_id', 'Comments', ['channel_id', 'post_id', 'time', 'id'], unique=False)
+
+
+def drop_indexes() -> None:
+    op.drop_index('ix_Comments_channel_id_post_id_time_id', table_name='Comments')
+    op.drop_index('ix_Posts_channel_name_time', table_name='Posts')
+    op.drop_index('ix_Posts_channel_id_time', table_name='Posts')
+    op.drop_index('ix_Posts_time_channel_id_post_id', table_name='Posts')
+
+
+def rename_to_legacy(table: str) -> None:
+    op.rename_table(table, f'{table}_legacy')
+    op.execute(f'ALTER TABLE "{table}_legacy" RENAME CONSTRAINT "{table}_pkey" TO "{table}_legacy_pkey"')
+
+
+def upgrade() -> None:
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.execute(ENSURE_MONTH_PARTITION)
+
+    # Ключ секционированной таблицы должен включать time, поэтому внешний ключ
+    # Comments -> Posts по (channel_id, post_id) больше невозможен
+    op.drop_constraint('Comments_channel_id_post_id_fkey', 'Comments', type_='foreignkey')
+    drop_indexes()
+    rename_to_legacy('Posts')
+    rename_to_legacy('Comments')
+
+    op.create_table('Posts',
+    *posts_columns(),
+    sa.PrimaryKeyConstraint('channel_id', 'post_id', 'time', name='Posts_pkey'),
+    postgresql_partition_by='RANGE (time)'
+    )
+    op.create_table('Comments',
+    *comments_columns(),
+    sa.PrimaryKeyConstraint('channel_id', 'id', 'time', name='Comments_pkey'),
+    postgresql_partition_by='RANGE (time)'
+    )
+
+    for table, columns in (('Posts', POSTS_COLUMNS), ('Comments', COMMENTS_COLUMNS)):
+        # Секции на весь диапазон уже собранных данных и на три месяца вперёд
+        op.execute(
+            f"""
+            SELECT ensure_month_partition('{table}', month)
+            FROM generate_series(
+                date_trunc('month', COALESCE((SELECT min(time) FROM "{table}_legacy"), now()::timestamp)),
+                date_trunc('month', now()::timestamp) + interval '3 months',
+                interval '1 month'
+            ) AS month
+            """
+        )
+        op.execute(f'INSERT INTO "{table}" ({columns}) SELECT {columns} FROM "{table}_legacy"')
+        op.drop_table(f'{table}_legacy')
+
+    create_indexes()
+    # ### end Alembic commands ###
+
+
+def downgrade() -> None:
+    # ### commands auto generated by Alembic - please adjust! ###
+    drop_indexes()
+    rename_to_legacy('Posts')
+    rename_to_legacy('Comments')
+
+    op.create_table('Posts',
+    *posts_columns(),
+    sa.PrimaryKeyConstraint('channel_id', 'post_id', name='Posts_pkey')
+    )
+    op.create_table('Comments',
+    *comments_columns(),
+    sa.PrimaryKeyConstraint('channel_id', 'id', name='Comments_pkey')
+    )
+
+    # Отделённые при архивации секции в секционированных таблицах уже отсутствуют
+    op.execute(f'INSERT INTO "Posts" ({POSTS_COLUMNS}) SELECT {POSTS_COLUMNS} FROM "Posts_legacy" ON CONFLICT DO NOTHING')
+    op.execute(
+        f'INSERT INTO "Comments" ({COMMENTS_COLUMNS}) SELECT c.{COMMENTS_COLUMNS.replace(", ", ", c.")} '
+        'FROM "Comments_legacy" c JOIN "Posts" p ON p.channel_id = c.channel_id AND p.post_id = c.post_id '
+        'ON CONFLICT DO NOTHING'
+    )
+    op.drop_table('Comments_legacy')
+    op.drop_table('Posts_legacy')
+
+    op.create_foreign_key(
+        'Comments_channel_id_post_id_fkey', 'Comments', 'Posts',
+        ['channel_id', 'post_id'], ['channel_id', 'post_id']
+    )
+    create_indexes()
+    op.execute('DROP FUNCTION ensure_month_partition(text, timestamp)')
+    # ### end Alembic commands ###
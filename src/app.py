@@ -1,9 +1,13 @@
 # uvicorn main:app --host 0.0.0.0 --port 8000 --reload
 from fastapi import FastAPI
 
+from src.core.client_pool import client_pool
+from src.core.leases import account_leaser
 from src.routes.account import router as account_router
 from src.routes.proxy import router as proxy_router
 from src.routes.task import router as task_router
+from src.routes.metrics import router as metrics_router
+from src.routes.post import router as post_router
 
 
 def get_app() -> FastAPI:
@@ -17,5 +21,10 @@ def get_app() -> FastAPI:
     app.include_router(account_router, prefix="/account", tags=["Accounts"])
     app.include_router(proxy_router, prefix="/proxy", tags=["Proxies"])
     app.include_router(task_router, prefix="/task", tags=["tasks"])
+    app.include_router(post_router, prefix="/posts", tags=["Posts"])
+    app.include_router(metrics_router, prefix="/metrics", tags=["Metrics"])
+
+    app.add_event_handler("shutdown", client_pool.close)
+    app.add_event_handler("shutdown", account_leaser.close)
 
     return app
\ No newline at end of file
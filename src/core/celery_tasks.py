@@ -1,46 +1,618 @@
-# celery -A src.celery_tasks worker --loglevel=INFO --purge
-import asyncio
+# celery -A src.core.celery_tasks worker --pool=threads --concurrency=32 --loglevel=INFO --purge
 import logging
 
-from celery import Celery
+import os
+from datetime import datetime, timedelta, timezone
+
+from celery import Celery, chord, uuid
+from celery.concurrency.prefork import TaskPool as PreforkPool
+from celery.schedules import crontab
+from celery.utils.time import get_exponential_backoff_interval
+from celery.signals import (
+    worker_process_init, worker_process_shutdown, worker_ready, worker_shutdown,
+    task_prerun, task_postrun, task_retry, task_revoked
+)
 from redis import Redis
+from telethon.errors import FloodWaitError
 
 from src.core.config import Config
+from src.core.export import ExportFormat, export_channel, parquet_comments_path
+from src.core.client_pool import client_pool
+from src.core.leases import account_leaser
+from src.core.pool_stats import pool_stats
+from src.core.progress import ProgressReporter, progress_redis
+from src.core.rate_limiter import AccountCooldownError
+from src.core.runtime import AsyncRuntime
+from src.core.task_registry import task_registry
 from src.core.worker import Worker
 from src.dependencies import get_db
 from src.repositories.post import PostRepository
 from src.repositories.account import AccountRepository
 from src.repositories.comment import CommentRepository
+from src.repositories.channel_sync import ChannelSyncRepository
+from src.repositories.checkpoint import CheckpointRepository
+from src.repositories.partition import (
+    PartitionRepository, PARTITIONED_TABLES, month_start, shift_month, retention_cutoff
+)
+from src.utils.utils import split_id_range, chunk_id_range, group_links_by_channel, explode_link
 
 
 celery = Celery("celery_task", broker=Config().broker, backend=Config().backend)
 redis = Redis(host=Config().REDIS_HOST, port=Config().REDIS_PORT, db=1)
 
+# Вместе с acks_late воркер берёт новую задачу только когда освобождается поток,
+# поэтому части обхода распределяются по узлам равномерно
+celery.conf.worker_prefetch_multiplier = 1
+
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@celery.task
-def celery_get_posts(params: dict): 
+# Клиенты из client_pool привязаны к циклу событий, в котором подключены,
+# поэтому все задачи процесса выполняются в одном долгоживущем цикле.
+# Воркер запускается с --pool=threads: потоки Celery только передают корутины
+# в этот цикл, и один процесс ведёт до TASKS_PER_PROCESS обходов одновременно.
+runtime = AsyncRuntime(Config().TASKS_PER_PROCESS)
 
-    try:
-        asyncio.get_running_loop()
-    except RuntimeError:
-        asyncio.set_event_loop(asyncio.new_event_loop())
 
+def retry_countdown(retries: int) -> int:
+    """
+    Задержка перед повтором: экспоненциальная от CRAWL_RETRY_DELAY со случайным разбросом.
+    """
+    return get_exponential_backoff_interval(
+        factor=Config().CRAWL_RETRY_DELAY,
+        retries=retries,
+        maximum=Config().CRAWL_RETRY_MAX_DELAY,
+        full_jitter=True
+    )
+
+
+@worker_process_init.connect
+def warm_up_client_pool(**kwargs):
+    pool_stats.start()
+    if not Config().CLIENT_POOL_WARMUP:
+        return
+
+    runtime.run(account_leaser.warm_up(Config().CLIENT_POOL_WARMUP))
+
+
+@worker_ready.connect
+def warm_up_thread_pool(sender=None, **kwargs):
+    # С --pool=threads дочерних процессов нет и worker_process_init не приходит:
+    # задачи выполняются в основном процессе, поэтому клиенты прогреваются в нём
+    if isinstance(getattr(sender, "pool", None), PreforkPool):
+        return
+    warm_up_client_pool()
+
+
+@worker_shutdown.connect
+@worker_process_shutdown.connect
+def close_client_pool(**kwargs):
+    pool_stats.stop()
+    if not runtime.running:
+        return
+
+    runtime.run(client_pool.close())
+    runtime.run(account_leaser.close())
+    runtime.stop()
+
+
+@task_prerun.connect
+def mark_task_started(task_id=None, **kwargs):
+    task_registry.set_status(task_id, "STARTED")
+
+
+@task_postrun.connect
+def mark_task_finished(task_id=None, state=None, **kwargs):
+    # После self.retry состояние задачи уже записано обработчиком task_retry
+    if state and state != "RETRY":
+        task_registry.set_status(task_id, state)
+
+
+@task_retry.connect
+def mark_task_retried(request=None, **kwargs):
+    task_registry.set_status(request.id, "RETRY")
+
+
+@task_revoked.connect
+def mark_task_revoked(request=None, **kwargs):
+    task_registry.set_status(request.id, "REVOKED")
+
+
+@celery.task(bind=True, acks_late=True, max_retries=Config().CRAWL_MAX_RETRIES)
+def celery_get_posts(self, params: dict): 
 
     channel_link = params.get("channel_link")
     limit = params.get("limit")
+    batch_size = params.get("batch_size")
+    incremental = params.get("incremental", False)
+    min_id = params.get("min_id", 0)
+    offset_id = params.get("offset_id", 0)
+    # Корутины выполняются в потоке AsyncRuntime, где self.request (thread-local) пуст,
+    # поэтому id задачи и номер попытки читаются здесь, в потоке Celery
+    task_id = self.request.id
+    final = self.request.retries >= self.max_retries
+    # При повторе задачи Celery сохраняет её id, поэтому обход продолжится с контрольной точки
+    crawl_id = params.get("crawl_id") or task_id
+
+    # Worker вызывает on_progress через asyncio.to_thread: синхронные вызовы Redis здесь
+    # иначе останавливали бы общий цикл AsyncRuntime и все обходы процесса
+    def on_progress(processed: int, total: int | None):
+        percent = round(processed / total * 100, 1) if total else None
+        self.update_state(task_id=task_id, state="PROGRESS", meta={
+            "crawl_id": crawl_id,
+            "processed": processed,
+            "total": total,
+            "percent": percent,
+        })
+        task_registry.set_status(task_id, "PROGRESS", progress=percent if percent is not None else "")
+
+    async def crawl():
+        progress = ProgressReporter(
+            progress_redis, task_id, Config().PROGRESS_INTERVAL, Config().TASK_REGISTRY_TTL
+        )
+        try:
+            # Сессия открывается внутри цикла runtime: AsyncSession привязана к циклу событий
+            async with get_db() as session:
+                account_repo = AccountRepository(session)
+                post_repo = PostRepository(session)
+                comment_repo = CommentRepository(session)
+                sync_repo = ChannelSyncRepository(session)
+                checkpoint_repo = CheckpointRepository(session)
+
+                async with account_leaser.lease(account_repo) as account:
+                    client = await client_pool.acquire(account)
+                    worker = Worker(
+                        post_repo, account, comment_repo, sync_repo, checkpoint_repo, on_progress, client, progress
+                    )
+                    try:
+                        processed = await worker.run(
+                            channel_link=channel_link,
+                            limit=limit,
+                            batch_size=batch_size,
+                            incremental=incremental,
+                            crawl_id=crawl_id,
+                            min_id=min_id,
+                            offset_id=offset_id
+                        )
+                    except (FloodWaitError, AccountCooldownError) as e:
+                        await account_leaser.cooldown(account_repo, account.id, e.seconds)
+                        raise
+        except (FloodWaitError, AccountCooldownError) as e:
+            # После последней попытки повтора не будет, и подписчики должны получить error
+            await progress.publish("error" if final else "flood_wait", force=True, seconds=e.seconds, error=str(e))
+            raise
+        except Exception as e:
+            await progress.publish("error" if final else "retry", force=True, error=str(e))
+            raise
+
+        await progress.publish("done", force=True, processed=processed)
+        return processed, worker.comment_pool.failed
+
+    try:
+        processed, failed_threads = runtime.run(crawl())
+    except (FloodWaitError, AccountCooldownError) as e:
+        # Аккаунт заморожен: сразу продолжаем обход с контрольной точки на другом аккаунте
+        logger.warning(f"Обход {crawl_id} переносится на другой аккаунт: {e}")
+        raise self.retry(exc=e, countdown=0)
+    except Exception as e:
+        logger.error(f"Обход {crawl_id} прерван: {e}")
+        raise self.retry(exc=e, countdown=retry_countdown(self.request.retries))
+
+    return {"crawl_id": crawl_id, "processed": processed, "failed_threads": failed_threads}
+
+
+@celery.task(bind=True, acks_late=True, max_retries=Config().CRAWL_MAX_RETRIES)
+def celery_collect(self, params: dict):
+    """
+    Собирает посты и комментарии по списку ссылок на сообщения.
+
+    Ссылки группируются по каналам: каждый канал разрешается один раз, а сообщения
+    запрашиваются пачками id (см. Worker.fetch_messages). При FloodWait задача
+    повторяется на другом аккаунте только для ещё не собранных каналов.
+    """
+    urls = params.get("urls", [])
+    comments_limit = params.get("limit", 100)
+    comments_reverse = params.get("asc", False)
+    channels = group_links_by_channel(urls)
+    collected: list[str] = []
+    # См. celery_get_posts: self.request недоступен в потоке AsyncRuntime
+    task_id = self.request.id
+    final = self.request.retries >= self.max_retries
+
+    async def collect():
+        progress = ProgressReporter(
+            progress_redis, task_id, Config().PROGRESS_INTERVAL, Config().TASK_REGISTRY_TTL
+        )
+        processed = 0
+        try:
+            async with get_db() as session:
+                account_repo = AccountRepository(session)
+
+                async with account_leaser.lease(account_repo) as account:
+                    client = await client_pool.acquire(account)
+                    worker = Worker(
+                        PostRepository(session), account, CommentRepository(session),
+                        client=client, progress=progress
+                    )
+                    try:
+                        for channel_name, message_ids in channels.items():
+                            processed += await worker.fetch_messages(
+                                channel_name, message_ids, comments_limit, comments_reverse
+                            )
+                            collected.append(channel_name)
+                    except (FloodWaitError, AccountCooldownError) as e:
+                        await account_leaser.cooldown(account_repo, account.id, e.seconds)
+                        raise
+        except (FloodWaitError, AccountCooldownError) as e:
+            # После последней попытки повтора не будет, и подписчики должны получить error
+            await progress.publish("error" if final else "flood_wait", force=True, seconds=e.seconds, error=str(e))
+            raise
+        except Exception as e:
+            await progress.publish("error" if final else "retry", force=True, error=str(e))
+            raise
+
+        await progress.publish("done", force=True, processed=processed)
+        return processed, worker.comment_pool.failed
+
+    try:
+        processed, failed_threads = runtime.run(collect())
+    except (FloodWaitError, AccountCooldownError) as e:
+        remaining = [url for url in urls if explode_link(url)["channel_name"] not in collected]
+        logger.warning(f"Сбор {task_id}: {len(remaining)} ссылок переносится на другой аккаунт: {e}")
+        raise self.retry(args=[{**params, "urls": remaining}], exc=e, countdown=0)
+    except Exception as e:
+        logger.error(f"Сбор {task_id} прерван: {e}")
+        raise self.retry(exc=e, countdown=retry_countdown(self.request.retries))
+
+    return {"urls": len(urls), "channels": len(channels), "processed": processed, "failed_threads": failed_threads}
+
+
+@celery.task(bind=True, acks_late=True, max_retries=Config().CRAWL_MAX_RETRIES)
+def celery_rescan(self, params: dict):
+    """
+    Пересобирает посты канала за последние days дней в режиме обновления.
+
+    Посты и комментарии, у которых изменились текст, медиа или реакции, перезаписываются,
+    а неизменившиеся отбрасываются по content_hash до записи. Медиа скачивается заново,
+    только если его заменили в посте.
+    """
+    channel_link = params.get("channel_link")
+    days = params.get("days") or Config().RESCAN_DAYS
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    # См. celery_get_posts: self.request недоступен в потоке AsyncRuntime
+    task_id = self.request.id
+    final = self.request.retries >= self.max_retries
+
+    async def rescan():
+        progress = ProgressReporter(
+            progress_redis, task_id, Config().PROGRESS_INTERVAL, Config().TASK_REGISTRY_TTL
+        )
+        try:
+            async with get_db() as session:
+                account_repo = AccountRepository(session)
+
+                async with account_leaser.lease(account_repo) as account:
+                    client = await client_pool.acquire(account)
+                    worker = Worker(
+                        PostRepository(session), account, CommentRepository(session),
+                        client=client, progress=progress, refresh=True
+                    )
+                    try:
+                        processed = await worker.run(
+                            channel_link=channel_link,
+                            limit=None,
+                            batch_size=params.get("batch_size"),
+                            since=since
+                        )
+                    except (FloodWaitError, AccountCooldownError) as e:
+                        await account_leaser.cooldown(account_repo, account.id, e.seconds)
+                        raise
+        except (FloodWaitError, AccountCooldownError) as e:
+            # После последней попытки повтора не будет, и подписчики должны получить error
+            await progress.publish("error" if final else "flood_wait", force=True, seconds=e.seconds, error=str(e))
+            raise
+        except Exception as e:
+            await progress.publish("error" if final else "retry", force=True, error=str(e))
+            raise
+
+        await progress.publish("done", force=True, processed=processed)
+        return processed, worker.comment_pool.failed
+
+    try:
+        processed, failed_threads = runtime.run(rescan())
+    except (FloodWaitError, AccountCooldownError) as e:
+        logger.warning(f"Обновление канала {channel_link} переносится на другой аккаунт: {e}")
+        raise self.retry(exc=e, countdown=0)
+    except Exception as e:
+        logger.error(f"Обновление канала {channel_link} прервано: {e}")
+        raise self.retry(exc=e, countdown=retry_countdown(self.request.retries))
 
-    with get_db() as session:
-        
+    return {"channel_link": channel_link, "days": days, "processed": processed, "failed_threads": failed_threads}
+
+
+@celery.task(bind=True, acks_late=True, max_retries=Config().CRAWL_MAX_RETRIES)
+def celery_sample_metrics(self, params: dict):
+    """
+    Записывает снимки метрик постов канала за последние seconds секунд.
+
+    Читается только история канала: посты, медиа и ветки комментариев не трогаются,
+    поэтому периодический сбор метрик не расходует лимиты GetReplies и GetFile.
+    """
+    channel_link = params.get("channel_link")
+    seconds = params.get("seconds") or Config().METRICS_WINDOW
+    since = datetime.now(timezone.utc) - timedelta(seconds=seconds)
+    # См. celery_get_posts: self.request недоступен в потоке AsyncRuntime
+    task_id = self.request.id
+    final = self.request.retries >= self.max_retries
+
+    async def sample():
+        progress = ProgressReporter(
+            progress_redis, task_id, Config().PROGRESS_INTERVAL, Config().TASK_REGISTRY_TTL
+        )
+        try:
+            async with get_db() as session:
+                account_repo = AccountRepository(session)
+
+                async with account_leaser.lease(account_repo) as account:
+                    client = await client_pool.acquire(account)
+                    worker = Worker(
+                        PostRepository(session), account, CommentRepository(session),
+                        client=client, progress=progress
+                    )
+                    try:
+                        processed = await worker.sample_metrics(channel_link, since, params.get("batch_size"))
+                    except (FloodWaitError, AccountCooldownError) as e:
+                        await account_leaser.cooldown(account_repo, account.id, e.seconds)
+                        raise
+        except (FloodWaitError, AccountCooldownError) as e:
+            await progress.publish("error" if final else "flood_wait", force=True, seconds=e.seconds, error=str(e))
+            raise
+        except Exception as e:
+            await progress.publish("error" if final else "retry", force=True, error=str(e))
+            raise
+
+        await progress.publish("done", force=True, processed=processed)
+        return processed
+
+    try:
+        processed = runtime.run(sample())
+    except (FloodWaitError, AccountCooldownError) as e:
+        logger.warning(f"Сбор метрик канала {channel_link} переносится на другой аккаунт: {e}")
+        raise self.retry(exc=e, countdown=0)
+    except Exception as e:
+        logger.error(f"Сбор метрик канала {channel_link} прерван: {e}")
+        raise self.retry(exc=e, countdown=retry_countdown(self.request.retries))
+
+    return {"channel_link": channel_link, "seconds": seconds, "processed": processed}
+
+
+async def get_last_post_id(channel_link: str) -> tuple[int | None, int]:
+    """
+    Возвращает id последнего сообщения канала и количество активных аккаунтов.
+    """
+    async with get_db() as session:
         account_repo = AccountRepository(session)
-        post_repo = PostRepository(session)
-        comment_repo = CommentRepository(session)
+        async with account_leaser.lease(account_repo) as account:
+            client = await client_pool.acquire(account)
+            worker = Worker(PostRepository(session), account, CommentRepository(session), client=client)
+            last_post_id = await worker.get_last_post_id(channel_link)
+        return last_post_id, len(await account_repo.get_accounts_by_status(active=True))
+
+
+async def publish_event(task_id: str, event: str, **extra) -> None:
+    """
+    Публикует одиночное событие задачи, у которой нет собственного хода обхода.
+    """
+    progress = ProgressReporter(progress_redis, task_id, Config().PROGRESS_INTERVAL, Config().TASK_REGISTRY_TTL)
+    await progress.publish(event, force=True, **extra)
+
+
+def plan_windows(task_id: str, crawl_id: str, channel_link: str, batch_size: int | None, split) -> dict:
+    """
+    Делит диапазон id канала функцией split(last_post_id, active_accounts) и запускает окна.
+
+    Планировщик завершается сразу после постановки окон в очередь, поэтому его подписчики
+    получают done с crawl_id и количеством окон, а при ошибке планирования — error.
+    """
+    try:
+        last_post_id, active_accounts = runtime.run(get_last_post_id(channel_link))
+        windows = split(last_post_id or 0, active_accounts)
+        logger.info(f"Обход {crawl_id}: {len(windows)} окон до id {last_post_id}")
+        dispatch_windows(crawl_id, channel_link, windows, batch_size)
+    except Exception as e:
+        runtime.run(publish_event(task_id, "error", error=str(e)))
+        raise
+
+    result = {"crawl_id": crawl_id, "last_post_id": last_post_id, "shards": len(windows)}
+    runtime.run(publish_event(task_id, "done", **result))
+    return result
+
+
+def dispatch_windows(crawl_id: str, channel_link: str, windows: list[tuple[int, int]], batch_size: int | None):
+    """
+    Запускает обход окон id сообщений группой задач celery_get_posts с callback-задачей chord.
+    """
+    header = [
+        celery_get_posts.s({
+            "channel_link": channel_link,
+            "limit": None,
+            "batch_size": batch_size,
+            "min_id": min_id,
+            "offset_id": max_id + 1,
+            "crawl_id": f"{crawl_id}:{min_id}-{max_id}",
+        })
+        for min_id, max_id in windows
+    ]
+    chord(header)(celery_crawl_done.s({"crawl_id": crawl_id, "channel_link": channel_link}))
+
+
+@celery.task(bind=True)
+def celery_crawl_sharded(self, params: dict):
+    """
+    Делит диапазон id сообщений канала на окна и обходит их параллельно разными аккаунтами.
+
+    Каждое окно выполняется отдельной задачей celery_get_posts со своим арендованным
+    аккаунтом и своей контрольной точкой. Обход завершается callback-задачей chord
+    только после того, как отчитались все шарды.
+    """
+    return plan_windows(
+        self.request.id,
+        params.get("crawl_id") or self.request.id,
+        params.get("channel_link"),
+        params.get("batch_size"),
+        lambda last_post_id, active_accounts: split_id_range(last_post_id, params.get("shards") or active_accounts)
+    )
+
+
+@celery.task(bind=True)
+def celery_plan_crawl(self, params: dict):
+    """
+    Планирует обход канала частями фиксированного размера.
+
+    Диапазон id сообщений делится на окна по chunk_size id, от новых к старым. Каждое окно
+    становится отдельной короткой задачей celery_get_posts, которую берёт любой свободный
+    воркер. Упавшая часть повторяется с экспоненциальной задержкой со своей контрольной
+    точки, не затрагивая остальные, а итог сводит callback-задача chord.
+    """
+    chunk_size = params.get("chunk_size") or Config().CRAWL_CHUNK_SIZE
+    return plan_windows(
+        self.request.id,
+        params.get("crawl_id") or self.request.id,
+        params.get("channel_link"),
+        params.get("batch_size"),
+        lambda last_post_id, _: chunk_id_range(last_post_id, chunk_size)
+    )
+
+
+@celery.task
+def celery_crawl_done(results: list[dict], params: dict):
+    """
+    Сводит результаты шардов обхода.
+    """
+    processed = sum(result["processed"] for result in results)
+    failed_threads = sum(result.get("failed_threads", 0) for result in results)
+    logger.info(
+        f"Обход {params['crawl_id']} канала {params['channel_link']} завершён, обработано {processed}, "
+        f"не собрано веток комментариев: {failed_threads}"
+    )
+    result = {**params, "processed": processed, "failed_threads": failed_threads, "shards": len(results)}
+    # Итог обхода остаётся в ключе crawl_id, даже если подписка на планировщик уже закрыта
+    runtime.run(publish_event(params["crawl_id"], "done", **result))
+    return result
+
+
+@celery.task(bind=True)
+def celery_export(self, params: dict):
+    """
+    Выгружает посты канала с комментариями в EXPORT_DIR в формате parquet, jsonl или xlsx.
+    """
+    channel = params["channel"]
+    export_format = ExportFormat(params.get("format", ExportFormat.parquet))
+    since = datetime.fromisoformat(params["since"]) if params.get("since") else None
+    until = datetime.fromisoformat(params["until"]) if params.get("until") else None
+    # См. celery_get_posts: self.request недоступен в потоке AsyncRuntime
+    task_id = self.request.id
+    path = os.path.join(Config().EXPORT_DIR, f"{channel}_{task_id}.{export_format.value}")
+
+    async def export():
+        progress = ProgressReporter(
+            progress_redis, task_id, Config().PROGRESS_INTERVAL, Config().TASK_REGISTRY_TTL
+        )
+        try:
+            posts, comments = await export_channel(
+                path, export_format, channel, Config().EXPORT_BATCH_SIZE, since, until, progress
+            )
+        except Exception as e:
+            await progress.publish("error", force=True, error=str(e))
+            raise
+
+        await progress.publish("done", force=True, path=path)
+        return posts, comments
+
+    posts, comments = runtime.run(export())
+    result = {"channel": channel, "path": path, "posts": posts, "comments": comments}
+    if export_format == ExportFormat.parquet:
+        result["comments_path"] = parquet_comments_path(path)
+    return result
+
+
+@celery.task
+def celery_sample_synced_metrics():
+    """
+    Ставит celery_sample_metrics за последние METRICS_WINDOW секунд для каждого синхронизированного канала.
+
+    Инкрементальная синхронизация читает только сообщения выше водяного знака, а снимок
+    метрик записывается лишь при повторном чтении поста, поэтому без периодического
+    сбора у поста был бы единственный снимок и ряд метрик не строился бы. Задачи
+    регистрируются в task_registry, чтобы их можно было найти и отменить через /task.
+    """
+    async def usernames():
+        async with get_db() as session:
+            return await ChannelSyncRepository(session).get_usernames()
+
+    seconds = Config().METRICS_WINDOW
+    channels = runtime.run(usernames())
+    for username in channels:
+        task_id = uuid()
+        task_registry.register(task_id, celery_sample_metrics.name, username)
+        celery_sample_metrics.apply_async(args=[{"channel_link": username, "seconds": seconds}], task_id=task_id)
+    logger.info(f"Сбор метрик поставлен для {len(channels)} каналов за {seconds} с")
+    return {"channels": len(channels), "seconds": seconds}
+
+
+@celery.task
+def celery_maintain_partitions():
+    """
+    Создаёт месячные секции таблиц PARTITIONED_TABLES на PARTITION_PREMAKE_MONTHS вперёд
+    и архивирует секции старше RETENTION_MONTHS: секция отключается, чтобы в неё
+    больше не попадали строки, затем выгружается в ARCHIVE_DIR и удаляется целиком.
+    """
+    config = Config()
+    current = month_start(datetime.now(timezone.utc))
+
+    async def maintain():
+        archived = []
+        async with get_db() as session:
+            partition_repo = PartitionRepository(session)
+            for table in PARTITIONED_TABLES:
+                await partition_repo.ensure_partitions(
+                    table, [shift_month(current, months) for months in range(config.PARTITION_PREMAKE_MONTHS + 1)]
+                )
+                # Секции создаются в транзакции сессии и без фиксации откатились бы при её закрытии
+                await session.commit()
+
+                cutoff = retention_cutoff()
+                if cutoff is None:
+                    continue
+
+                for name, month in await partition_repo.list_partitions(table):
+                    if month < cutoff:
+                        await partition_repo.detach_partition(table, name, month)
 
-        account = account_repo.get_account()
+                # Сюда же попадают секции, отключённые прошлым запуском, выгрузка которых не удалась
+                for name, month in await partition_repo.list_detached(table):
+                    # Метка времени в имени: повторно созданный месяц не затирает прежний архив
+                    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+                    await partition_repo.export_partition(
+                        name, os.path.join(config.ARCHIVE_DIR, f"{name}_{stamp}.csv.gz")
+                    )
+                    await partition_repo.drop_table(name)
+                    logger.info(f"Секция {name} выгружена в архив и удалена")
+                    archived.append(name)
+        return archived
 
-        worker = Worker(post_repo, account, comment_repo)
+    return {"archived": runtime.run(maintain())}
 
-        asyncio.run(worker.run(channel_link=channel_link, limit=limit))
 
+celery.conf.beat_schedule = {
+    "maintain-partitions": {
+        "task": celery_maintain_partitions.name,
+        "schedule": crontab(hour=3, minute=0),
+    },
+}
+if Config().METRICS_SAMPLE_INTERVAL:
+    celery.conf.beat_schedule["sample-metrics"] = {
+        "task": celery_sample_synced_metrics.name,
+        "schedule": Config().METRICS_SAMPLE_INTERVAL,
+    }
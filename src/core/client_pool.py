@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+
+import socks
+from telethon import TelegramClient
+
+from src.core.config import Config
+from src.db.models import Account
+
+logger = logging.getLogger(__name__)
+
+
+def build_client(account: Account) -> TelegramClient:
+    """
+    Создает TelegramClient для аккаунта, используя его сессию и прокси.
+    """
+    config = Config()
+
+    proxy = None
+    if account.proxy is not None:
+        proxy = (
+            socks.HTTP,
+            account.proxy.addr,
+            account.proxy.port,
+            True,
+            account.proxy.username,
+            account.proxy.password
+        )
+
+    # Telethon не должен сам пережидать FloodWait: ошибка нужна ограничителю запросов,
+    # чтобы заморозить аккаунт и перенести задачу на другой
+    return TelegramClient(
+        f'{config.SESSIONS_DIR}/{account.login}.session',
+        config.API_ID,
+        config.API_HASH,
+        proxy=proxy,
+        flood_sleep_threshold=0
+    )
+
+
+class ClientPool:
+    """
+    Пул подключённых TelegramClient процесса, по одному клиенту на аккаунт.
+
+    Клиент подключается один раз и переиспользуется всеми задачами процесса.
+    Клиент, простаивавший дольше idle_check секунд, перед выдачей проверяется
+    запросом get_me и при необходимости переподключается. Клиенты привязаны
+    к циклу событий, в котором были подключены, поэтому пул нужно использовать
+    из одного долгоживущего цикла.
+    """
+
+    def __init__(self, idle_check: float):
+        self.idle_check = idle_check
+        self._clients: dict[int, TelegramClient] = {}
+        self._last_used: dict[int, float] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    async def acquire(self, account: Account) -> TelegramClient:
+        """
+        Возвращает подключённый клиент аккаунта, создавая его при первом обращении.
+        """
+        async with self._locks.setdefault(account.id, asyncio.Lock()):
+            client = self._clients.get(account.id)
+
+            if client is None:
+                client = build_client(account)
+                await client.connect()
+                self._clients[account.id] = client
+                logger.info(f"Клиент аккаунта {account.login} подключён")
+            elif time.monotonic() - self._last_used[account.id] > self.idle_check:
+                await self._check(account, client)
+
+            self._last_used[account.id] = time.monotonic()
+            return client
+
+    async def _check(self, account: Account, client: TelegramClient) -> None:
+        """
+        Проверяет простаивавший клиент и переподключает его при ошибке.
+        """
+        try:
+            if not client.is_connected():
+                await client.connect()
+            await client.get_me()
+        except Exception as e:
+            logger.warning(f"Клиент аккаунта {account.login} не отвечает, переподключение: {e}")
+            await client.disconnect()
+            await client.connect()
+
+    def __contains__(self, account_id: int) -> bool:
+        return account_id in self._clients
+
+    def idle_accounts(self, idle_after: float) -> list[int]:
+        """
+        Возвращает ID аккаунтов, клиенты которых не выдавались дольше idle_after секунд.
+        """
+        now = time.monotonic()
+        return [account_id for account_id, last_used in self._last_used.items() if now - last_used > idle_after]
+
+    async def discard(self, account_id: int) -> None:
+        """
+        Отключает клиент аккаунта и убирает его из пула.
+        """
+        client = self._clients.pop(account_id, None)
+        self._last_used.pop(account_id, None)
+        if client is not None:
+            await client.disconnect()
+
+    async def close(self) -> None:
+        """
+        Отключает все клиенты пула.
+        """
+        for client in self._clients.values():
+            await client.disconnect()
+        self._clients.clear()
+        self._last_used.clear()
+        logger.info("Пул клиентов Telegram закрыт")
+
+
+client_pool = ClientPool(Config().CLIENT_IDLE_CHECK)
@@ -1,5 +1,7 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 from pathlib import Path
+from typing import Optional
 
 class Config(BaseSettings):
 
@@ -22,6 +24,110 @@ class Config(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
 
+    # Предел соединений сервера (max_connections, см. docker-compose.yaml) делится между
+    # DB_PROCESSES процессами с собственным пулом (API и воркеры Celery) за вычетом
+    # DB_RESERVED_CONNECTIONS для суперпользователя, миграций и psql
+    DB_MAX_CONNECTIONS: int = 200
+    DB_PROCESSES: int = 2
+    DB_RESERVED_CONNECTIONS: int = 10
+    # Процесс воркера одновременно держит до TASKS_PER_PROCESS сессий обходов и до
+    # COMMENTS_PROCESS_CONCURRENCY сессий веток комментариев. По умолчанию (None) пул
+    # рассчитывается из этих настроек в пределах доли процесса, см. db_pool_size и db_max_overflow
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Как часто воркеры публикуют метрики своего пула соединений для /metrics/db
+    DB_POOL_STATS_INTERVAL: float = 15.0
+
+    POSTS_BATCH_SIZE: int = 100
+    COMMENTS_BATCH_SIZE: int = 500
+    BATCH_FLUSH_INTERVAL: float = 5.0
+    COMMENTS_CONCURRENCY: int = 8
+    # Веток комментариев со своей сессией БД одновременно на процесс, по всем обходам.
+    # Без этого предела процесс открыл бы до TASKS_PER_PROCESS * (1 + COMMENTS_CONCURRENCY) соединений
+    COMMENTS_PROCESS_CONCURRENCY: int = 24
+
+    TASKS_PER_PROCESS: int = 32
+
+    CLIENT_POOL_WARMUP: int = 0
+    CLIENT_IDLE_CHECK: float = 60.0
+    CLIENT_IDLE_RELEASE: float = 300.0
+
+    ACCOUNT_LEASE_TTL: int = 120
+
+    RATE_LIMIT_RATE: float = 1.0
+    RATE_LIMIT_MIN: float = 0.05
+    RATE_LIMIT_MAX: float = 5.0
+    RATE_LIMIT_STEP: float = 0.01
+    RATE_LIMIT_BURST: int = 5
+
+    CHECKPOINT_EVERY: int = 500
+    CRAWL_MAX_RETRIES: int = 5
+    CRAWL_RETRY_DELAY: int = 60
+    CRAWL_RETRY_MAX_DELAY: int = 900
+    CRAWL_CHUNK_SIZE: int = 5000
+    # Сколько раз подряд ссылка сбора комментариев ждёт аккаунт с подключённым клиентом
+    COLLECT_MAX_ATTEMPTS: int = 3
+    # За сколько последних дней пересобираются посты при обновлении реакций и текста
+    RESCAN_DAYS: int = 2
+
+    TASK_REGISTRY_TTL: int = 7 * 24 * 3600
+    PROGRESS_INTERVAL: float = 1.0
+    PROGRESS_KEEPALIVE: float = 15.0
+
+    ENTITY_CACHE_SIZE: int = 10000
+    ENTITY_CACHE_LOCAL_TTL: float = 600.0
+    ENTITY_CACHE_TTL: int = 7 * 24 * 3600
+
+    STREAM_CHUNK_SIZE: int = 1000
+
+    # Период и шаг ряда метрик поста по умолчанию, в секундах, и предельное число точек ряда
+    METRICS_WINDOW: int = 48 * 3600
+    METRICS_STEP: int = 3600
+    METRICS_MAX_POINTS: int = 5000
+    # Как часто beat снимает метрики постов синхронизированных каналов за последние
+    # METRICS_WINDOW секунд, чтобы у метрик появлялись новые снимки (0 — не снимать)
+    METRICS_SAMPLE_INTERVAL: int = 3600
+
+    PARTITION_PREMAKE_MONTHS: int = 3
+    # Секции старше RETENTION_MONTHS месяцев выгружаются в ARCHIVE_DIR и удаляются (0 — хранить всё)
+    RETENTION_MONTHS: int = 0
+    ARCHIVE_DIR: str = "/output/archive"
+
+    EXPORT_DIR: str = "/output/exports"
+    # Постов на страницу выгрузки и в группу строк Parquet
+    EXPORT_BATCH_SIZE: int = 500
+
+    @property
+    def db_connection_budget(self):
+        return (self.DB_MAX_CONNECTIONS - self.DB_RESERVED_CONNECTIONS) // self.DB_PROCESSES
+
+    @property
+    def db_pool_size(self):
+        if self.DB_POOL_SIZE is not None:
+            return self.DB_POOL_SIZE
+        return min(self.TASKS_PER_PROCESS, self.db_connection_budget)
+
+    @property
+    def db_max_overflow(self):
+        if self.DB_MAX_OVERFLOW is not None:
+            return self.DB_MAX_OVERFLOW
+        wanted = self.TASKS_PER_PROCESS + self.COMMENTS_PROCESS_CONCURRENCY - self.db_pool_size
+        return max(min(wanted, self.db_connection_budget - self.db_pool_size), 0)
+
+    @model_validator(mode="after")
+    def check_db_pool(self):
+        # Пулы всех процессов вместе не должны превышать max_connections сервера
+        if self.db_pool_size + self.db_max_overflow > self.db_connection_budget:
+            raise ValueError(
+                f"Пул соединений процесса ({self.db_pool_size} + {self.db_max_overflow}) больше его доли "
+                f"соединений Postgres: ({self.DB_MAX_CONNECTIONS} - {self.DB_RESERVED_CONNECTIONS}) "
+                f"// {self.DB_PROCESSES} = {self.db_connection_budget}"
+            )
+        return self
+
     @property
     def broker(self):
         return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/0"
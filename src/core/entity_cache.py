@@ -0,0 +1,135 @@
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+
+from redis.asyncio import Redis
+from telethon import TelegramClient
+from telethon.tl.types import Channel, ChatPhotoEmpty
+
+from src.core.config import Config
+from src.core.rate_limiter import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+USERNAME_RE = re.compile(r"^(?:(?:https?://)?(?:t|telegram)\.me/|@)?([A-Za-z][A-Za-z0-9_]{3,31})/?$")
+
+
+def channel_username(channel_link: str) -> str | None:
+    """
+    Возвращает username канала из ссылки вида https://t.me/name, t.me/name, @name или name.
+    Для приглашений и других ссылок без username возвращает None.
+    """
+    match = USERNAME_RE.match(channel_link.strip())
+    return match.group(1).lower() if match else None
+
+
+class EntityCache:
+    """
+    Двухуровневый кэш каналов: username -> (id, access_hash, title).
+
+    Первый уровень — LRU в памяти процесса, второй — Redis, общий для всех воркеров.
+    access_hash действителен только для аккаунта, который его получил, поэтому записи
+    хранятся отдельно для каждого аккаунта. Из записи собирается объект Channel,
+    который Telethon превращает в InputPeerChannel без запроса ResolveUsername.
+    """
+
+    def __init__(self, redis: Redis, size: int, local_ttl: float, ttl: int):
+        self.redis = redis
+        self.size = size
+        self.local_ttl = local_ttl
+        self.ttl = ttl
+        self._local: OrderedDict[tuple[int, str], tuple[float, dict]] = OrderedDict()
+
+    @staticmethod
+    def _key(account_id: int, username: str) -> str:
+        return f"entity:{account_id}:{username}"
+
+    @staticmethod
+    def _to_channel(entry: dict) -> Channel:
+        return Channel(
+            id=entry["id"],
+            title=entry["title"],
+            photo=ChatPhotoEmpty(),
+            date=None,
+            access_hash=entry["access_hash"],
+            username=entry["username"],
+            broadcast=entry.get("broadcast"),
+            megagroup=entry.get("megagroup"),
+        )
+
+    def _remember(self, account_id: int, username: str, entry: dict) -> None:
+        self._local[(account_id, username)] = (time.monotonic() + self.local_ttl, entry)
+        self._local.move_to_end((account_id, username))
+        while len(self._local) > self.size:
+            self._local.popitem(last=False)
+
+    async def get(self, account_id: int, username: str) -> Channel | None:
+        """
+        Возвращает канал из кэша или None.
+        """
+        cached = self._local.get((account_id, username))
+        if cached and cached[0] > time.monotonic():
+            self._local.move_to_end((account_id, username))
+            return self._to_channel(cached[1])
+
+        raw = await self.redis.get(self._key(account_id, username))
+        if raw is None:
+            self._local.pop((account_id, username), None)
+            return None
+
+        entry = json.loads(raw)
+        self._remember(account_id, username, entry)
+        return self._to_channel(entry)
+
+    async def set(self, account_id: int, username: str, channel: Channel) -> None:
+        """
+        Сохраняет канал в обоих уровнях кэша.
+        """
+        entry = {
+            "id": channel.id,
+            "access_hash": channel.access_hash,
+            "title": channel.title,
+            "username": channel.username,
+            "broadcast": channel.broadcast,
+            "megagroup": channel.megagroup,
+        }
+        self._remember(account_id, username, entry)
+        await self.redis.set(self._key(account_id, username), json.dumps(entry), ex=self.ttl)
+
+    async def invalidate(self, account_id: int, channel_link: str) -> None:
+        """
+        Удаляет канал из кэша, например если канал сменил username или стал недоступен.
+        """
+        username = channel_username(channel_link)
+        if username is None:
+            return
+        self._local.pop((account_id, username), None)
+        await self.redis.delete(self._key(account_id, username))
+
+    async def resolve(self, client: TelegramClient, account_id: int, channel_link: str):
+        """
+        Возвращает канал по ссылке, запрашивая ResolveUsername только при промахе кэша.
+        Ссылки без username и сущности, которые не являются каналами, не кэшируются.
+        """
+        username = channel_username(channel_link)
+        if username is not None:
+            channel = await self.get(account_id, username)
+            if channel is not None:
+                return channel
+
+        async with rate_limiter.guard(account_id, "ResolveUsername"):
+            entity = await client.get_entity(channel_link)
+
+        if username is not None and isinstance(entity, Channel) and entity.access_hash is not None:
+            await self.set(account_id, username, entity)
+        return entity
+
+
+entity_cache = EntityCache(
+    Redis(host=Config().REDIS_HOST, port=Config().REDIS_PORT, db=1),
+    Config().ENTITY_CACHE_SIZE,
+    Config().ENTITY_CACHE_LOCAL_TTL,
+    Config().ENTITY_CACHE_TTL
+)
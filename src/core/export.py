@@ -0,0 +1,300 @@
+import asyncio
+import enum
+import json
+import logging
+import os
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+from src.core.progress import ProgressReporter
+from src.dependencies import get_db
+from src.repositories.comment import CommentRepository
+from src.repositories.post import PostRepository
+
+logger = logging.getLogger(__name__)
+
+POST_FIELDS = (
+    "channel_id", "post_id", "channel_name", "url", "text", "media", "time",
+    "reactions", "reactions_total", "replies_count",
+)
+COMMENT_FIELDS = ("id", "user_id", "text", "time")
+
+
+class ExportFormat(str, enum.Enum):
+    parquet = "parquet"
+    jsonl = "jsonl"
+    xlsx = "xlsx"
+
+
+class JsonlWriter:
+    """
+    Пишет по строке JSON на пост, комментарии вложены в поле comments.
+    Строка поста дописывается по частям, поэтому комментарии не копятся в памяти.
+    """
+
+    def __init__(self, path: str, batch_size: int):
+        self.file = open(path, "w", encoding="utf-8")
+        self.current: dict | None = None
+        self.empty = True
+
+    @staticmethod
+    def _dumps(value: dict) -> str:
+        return json.dumps(value, ensure_ascii=False, default=datetime.isoformat)
+
+    def write(self, chunk: list[tuple[dict, list[dict], bool]]) -> None:
+        for post, comments, last in chunk:
+            if post is not self.current:
+                # Открываем строку поста без закрывающей скобки и дописываем массив comments
+                self.file.write(self._dumps(post)[:-1] + ', "comments": [')
+                self.current, self.empty = post, True
+            for comment in comments:
+                self.file.write(("" if self.empty else ", ") + self._dumps(comment))
+                self.empty = False
+            if last:
+                self.file.write("]}\n")
+                self.current = None
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def parquet_comments_path(path: str) -> str:
+    """
+    Возвращает путь файла комментариев, который ParquetWriter пишет рядом с файлом постов.
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.comments{ext}"
+
+
+class ParquetWriter:
+    """
+    Пишет посты в Parquet, а комментарии — в отдельный файл parquet_comments_path(path)
+    с колонками channel_id и post_id. Вложенный list<struct> требует собрать все комментарии
+    поста в одну строку, поэтому комментарии вынесены в свой файл и пишутся группой строк
+    на каждую порцию. Посты копятся до batch_size и тоже пишутся группой строк.
+    """
+
+    schema = pa.schema([
+        ("channel_id", pa.int64()),
+        ("post_id", pa.int32()),
+        ("channel_name", pa.string()),
+        ("url", pa.string()),
+        ("text", pa.string()),
+        ("media", pa.string()),
+        ("time", pa.timestamp("us")),
+        ("reactions", pa.map_(pa.string(), pa.int32())),
+        ("reactions_total", pa.int32()),
+        ("replies_count", pa.int32()),
+    ])
+    comments_schema = pa.schema([
+        ("channel_id", pa.int64()),
+        ("post_id", pa.int32()),
+        ("id", pa.int32()),
+        ("user_id", pa.string()),
+        ("text", pa.string()),
+        ("time", pa.timestamp("us")),
+    ])
+
+    def __init__(self, path: str, batch_size: int):
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        self.comments_writer = pq.ParquetWriter(parquet_comments_path(path), self.comments_schema, compression="zstd")
+        self.batch_size = batch_size
+        self.posts: list[dict] = []
+        self.current: dict | None = None
+
+    def _flush_posts(self) -> None:
+        if self.posts:
+            self.writer.write_table(pa.Table.from_pylist(self.posts, schema=self.schema))
+            self.posts = []
+
+    def write(self, chunk: list[tuple[dict, list[dict], bool]]) -> None:
+        comments = []
+        for post, post_comments, last in chunk:
+            if post is not self.current:
+                self.posts.append(post)
+                self.current = post
+            comments.extend(
+                {"channel_id": post["channel_id"], "post_id": post["post_id"], **comment}
+                for comment in post_comments
+            )
+            if last:
+                self.current = None
+
+        if comments:
+            self.comments_writer.write_table(pa.Table.from_pylist(comments, schema=self.comments_schema))
+        if len(self.posts) >= self.batch_size:
+            self._flush_posts()
+
+    def close(self) -> None:
+        try:
+            self._flush_posts()
+        finally:
+            self.writer.close()
+            self.comments_writer.close()
+
+
+class XlsxWriter:
+    """
+    Пишет посты и комментарии на отдельные листы книги в режиме write_only:
+    строки сразу уходят во временный файл, а не копятся в памяти.
+    Когда лист заполнен до предела Excel, продолжение пишется на следующий лист.
+    """
+
+    MAX_ROWS = 1_048_576
+
+    def __init__(self, path: str, batch_size: int):
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.headers = {
+            "posts": POST_FIELDS,
+            "comments": ("channel_id", "post_id", *COMMENT_FIELDS),
+        }
+        self.sheets = {name: self._add_sheet(name, 1) for name in self.headers}
+        self.current: dict | None = None
+
+    def _add_sheet(self, name: str, number: int) -> list:
+        sheet = self.workbook.create_sheet(name if number == 1 else f"{name}_{number}")
+        sheet.append(self.headers[name])
+        return [sheet, number, 1]
+
+    @staticmethod
+    def _cell(value):
+        if isinstance(value, dict):
+            value = json.dumps(value, ensure_ascii=False)
+        if isinstance(value, str):
+            return ILLEGAL_CHARACTERS_RE.sub("", value)
+        return value
+
+    def _append(self, name: str, values: list) -> None:
+        state = self.sheets[name]
+        if state[2] >= self.MAX_ROWS:
+            state = self.sheets[name] = self._add_sheet(name, state[1] + 1)
+        state[0].append([self._cell(value) for value in values])
+        state[2] += 1
+
+    def write(self, chunk: list[tuple[dict, list[dict], bool]]) -> None:
+        for post, comments, last in chunk:
+            if post is not self.current:
+                self._append("posts", [post[field] for field in POST_FIELDS])
+                self.current = post
+            for comment in comments:
+                self._append(
+                    "comments",
+                    [post["channel_id"], post["post_id"], *(comment[field] for field in COMMENT_FIELDS)]
+                )
+            if last:
+                self.current = None
+
+    def close(self) -> None:
+        self.workbook.save(self.path)
+
+
+WRITERS = {
+    ExportFormat.parquet: ParquetWriter,
+    ExportFormat.jsonl: JsonlWriter,
+    ExportFormat.xlsx: XlsxWriter,
+}
+
+
+async def export_channel(
+    path: str,
+    export_format: ExportFormat,
+    channel_name: str,
+    batch_size: int,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    progress: ProgressReporter | None = None
+) -> tuple[int, int]:
+    """
+    Выгружает посты канала вместе с комментариями в файл path.
+
+    Посты читаются страницами по batch_size по ключу (time, channel_id, post_id),
+    комментарии страницы — серверным курсором. Комментарии не собираются в память
+    целиком: писателю уходят порции (пост, комментарии, последняя ли порция поста)
+    не больше batch_size строк, поэтому память ограничена одной порцией даже для
+    постов с огромными ветками. Внутри страницы посты пишутся в порядке post_id,
+    в котором курсор отдаёт комментарии. Транзакция страницы закрывается после её записи.
+
+    :return: (количество постов, количество комментариев).
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    writer = WRITERS[export_format](path, batch_size)
+    after = None
+    posts_total = comments_total = 0
+
+    try:
+        async with get_db() as session:
+            post_repo = PostRepository(session)
+            comment_repo = CommentRepository(session)
+
+            while True:
+                posts = await post_repo.page_posts(batch_size, after, channel_name=channel_name, since=since, until=until)
+                if not posts:
+                    break
+
+                chunk: list[tuple[dict, list[dict], bool]] = []
+                buffered = 0
+                comments = 0
+
+                async def flush():
+                    nonlocal chunk, buffered
+                    if chunk:
+                        await asyncio.to_thread(writer.write, chunk)
+                    chunk, buffered = [], 0
+
+                for channel_id in sorted({post.channel_id for post in posts}):
+                    channel_posts = sorted(
+                        (post for post in posts if post.channel_id == channel_id), key=lambda post: post.post_id
+                    )
+                    rows = [{field: getattr(post, field) for field in POST_FIELDS} for post in channel_posts]
+                    index = 0
+                    pending: list[dict] = []
+
+                    async for row in comment_repo.stream_post_comments(
+                        channel_id,
+                        [post.post_id for post in channel_posts],
+                        batch_size,
+                        min(post.time for post in channel_posts)
+                    ):
+                        # Посты до поста комментария полностью выгружены
+                        while rows[index]["post_id"] != row.post_id:
+                            chunk.append((rows[index], pending, True))
+                            buffered += len(pending) + 1
+                            pending = []
+                            index += 1
+
+                        pending.append({"id": row.id, "user_id": row.user_id, "text": row.text, "time": row.time})
+                        comments += 1
+                        if buffered + len(pending) >= batch_size:
+                            chunk.append((rows[index], pending, False))
+                            pending = []
+                            await flush()
+
+                    for row in rows[index:]:
+                        chunk.append((row, pending, True))
+                        buffered += len(pending) + 1
+                        pending = []
+                        if buffered >= batch_size:
+                            await flush()
+
+                await flush()
+                await session.rollback()
+                session.expunge_all()
+
+                last = posts[-1]
+                after = (last.time, last.channel_id, last.post_id)
+                posts_total += len(posts)
+                comments_total += comments
+
+                if progress is not None:
+                    progress.add(offset_id=last.post_id, posts=len(posts), comments=comments)
+                    await progress.publish()
+    finally:
+        await asyncio.to_thread(writer.close)
+
+    logger.info(f"Канал {channel_name} выгружен в {path}: {posts_total} постов, {comments_total} комментариев")
+    return posts_total, comments_total
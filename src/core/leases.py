@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import os
+import socket
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from src.core.config import Config
+from src.core.client_pool import client_pool
+from src.db.models import Account
+from src.dependencies import get_db
+from src.repositories.account import AccountRepository
+
+logger = logging.getLogger(__name__)
+
+
+class NoFreeAccountError(Exception):
+    pass
+
+
+class AccountLeaser:
+    """
+    Аренда аккаунтов процессом.
+
+    Владельцем аренды считается процесс (hostname:pid), поэтому клиент аккаунта
+    из ClientPool может переходить между задачами процесса, а другие процессы
+    этот аккаунт не получат. Внутри процесса аккаунт выдаётся одной задаче за раз.
+    Фоновая задача каждые ttl/3 секунд продлевает аренды процесса. Она же отключает
+    клиентов, простаивающих дольше CLIENT_IDLE_RELEASE секунд, и освобождает их аренды.
+    Аренды упавшего процесса истекают сами и достаются другим воркерам.
+    """
+
+    def __init__(self, ttl: int, idle_release: float):
+        self.ttl = ttl
+        self.idle_release = idle_release
+        self._in_use: set[int] = set()
+        self._renewal: asyncio.Task | None = None
+
+    @property
+    def holder(self) -> str:
+        # pid вычисляется при каждом обращении, так как объект создаётся до fork
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    @asynccontextmanager
+    async def lease(self, account_repo: AccountRepository) -> AsyncIterator[Account]:
+        """
+        Берёт в аренду свободный аккаунт на время блока.
+        """
+        account = await account_repo.lease_account(self.holder, self.ttl, exclude_ids=self._in_use)
+        if account is None:
+            raise NoFreeAccountError("Нет свободных аккаунтов")
+
+        account_id = account.id
+        self._in_use.add(account_id)
+        self._ensure_renewal()
+        try:
+            yield account
+        finally:
+            self._in_use.discard(account_id)
+            # Аренду держим, только пока в пуле есть подключённый клиент аккаунта
+            if account_id not in client_pool:
+                await account_repo.release_leases(self.holder, [account_id])
+
+    async def cooldown(self, account_repo: AccountRepository, account_id: int, seconds: int) -> None:
+        """
+        Отключает клиент аккаунта и не выдаёт аккаунт никому, пока не истечёт FloodWait.
+        """
+        await client_pool.discard(account_id)
+        await account_repo.set_cooldown(account_id, seconds)
+        logger.info(f"Аккаунт {account_id} выведен из выдачи на {seconds} с")
+
+    async def warm_up(self, count: int) -> None:
+        """
+        Арендует до count свободных аккаунтов и заранее подключает их клиентов.
+        """
+        async with get_db() as session:
+            account_repo = AccountRepository(session)
+            for _ in range(count):
+                account = await account_repo.lease_account(self.holder, self.ttl)
+                if account is None:
+                    break
+                try:
+                    await client_pool.acquire(account)
+                except Exception as e:
+                    logger.error(f"Ошибка подключения аккаунта {account.login}: {e}")
+                    await account_repo.release_leases(self.holder, [account.id])
+        self._ensure_renewal()
+
+    def _ensure_renewal(self) -> None:
+        if self._renewal is None or self._renewal.done():
+            self._renewal = asyncio.create_task(self._renew())
+
+    async def _renew(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                idle = [
+                    account_id for account_id in client_pool.idle_accounts(self.idle_release)
+                    if account_id not in self._in_use
+                ]
+                for account_id in idle:
+                    await client_pool.discard(account_id)
+
+                async with get_db() as session:
+                    account_repo = AccountRepository(session)
+                    await account_repo.release_leases(self.holder, idle)
+                    renewed = await account_repo.renew_leases(self.holder, self.ttl)
+            except Exception as e:
+                logger.error(f"Ошибка продления аренды аккаунтов: {e}")
+                continue
+
+            if not renewed and not self._in_use:
+                return
+
+    async def close(self) -> None:
+        """
+        Останавливает продление и освобождает все аренды процесса.
+        """
+        if self._renewal is not None:
+            self._renewal.cancel()
+            self._renewal = None
+
+        async with get_db() as session:
+            await AccountRepository(session).release_leases(self.holder)
+
+
+account_leaser = AccountLeaser(Config().ACCOUNT_LEASE_TTL, Config().CLIENT_IDLE_RELEASE)
@@ -0,0 +1,75 @@
+import json
+import logging
+import os
+import socket
+import threading
+
+from redis import Redis
+
+from src.core.config import Config
+from src.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStatsPublisher:
+    """
+    Публикует метрики пула соединений процесса в Redis, чтобы /metrics/db показывал
+    пулы воркеров Celery, а не только процесса API.
+
+    Каждый процесс раз в interval секунд записывает engine.pool.stats() в ключ
+    db_pool:{host}:{pid} со сроком жизни в три интервала, поэтому записи
+    остановленных процессов исчезают сами.
+    """
+
+    PREFIX = "db_pool:"
+
+    def __init__(self, redis: Redis, interval: float):
+        self.redis = redis
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.PREFIX}{socket.gethostname()}:{os.getpid()}"
+
+    def publish(self) -> None:
+        self.redis.set(self.key, json.dumps(engine.pool.stats()), ex=max(int(self.interval * 3), 1))
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.publish()
+            except Exception as e:
+                logger.warning(f"Не удалось опубликовать метрики пула соединений: {e}")
+
+    def start(self) -> None:
+        """
+        Запускает публикацию в фоновом потоке процесса.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="pool-stats", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def collect(self) -> dict[str, dict]:
+        """
+        Возвращает последние опубликованные метрики всех процессов по имени host:pid.
+        """
+        keys = list(self.redis.scan_iter(match=f"{self.PREFIX}*", count=100))
+        values = self.redis.mget(keys) if keys else []
+        return {
+            key.decode()[len(self.PREFIX):]: json.loads(value)
+            for key, value in zip(keys, values) if value is not None
+        }
+
+
+pool_stats = PoolStatsPublisher(
+    Redis(host=Config().REDIS_HOST, port=Config().REDIS_PORT, db=1),
+    Config().DB_POOL_STATS_INTERVAL
+)
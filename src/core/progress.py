@@ -0,0 +1,118 @@
+import json
+import time
+from typing import AsyncIterator, Callable
+
+from redis.asyncio import Redis
+
+from src.core.config import Config
+
+
+class ProgressReporter:
+    """
+    Публикует ход обхода в канал Redis pub/sub task:{task_id}:events.
+
+    Счётчики накапливаются синхронно через add(), а сообщение уходит не чаще
+    одного раза в interval секунд. Последний снимок также записывается в ключ
+    task_id, откуда его возвращает GET /task/{task_id} как task_result.
+    """
+
+    def __init__(self, redis: Redis, task_id: str, interval: float, ttl: int):
+        self.redis = redis
+        self.task_id = task_id
+        self.interval = interval
+        self.ttl = ttl
+        self.counters = {"posts": 0, "comments": 0, "media_bytes": 0, "failed_threads": 0}
+        self.offset_id: int | None = None
+        self.total: int | None = None
+        self._started = time.monotonic()
+        self._published = 0.0
+
+    @staticmethod
+    def channel(task_id: str) -> str:
+        return f"task:{task_id}:events"
+
+    def add(self, offset_id: int | None = None, total: int | None = None, **counters: int) -> None:
+        """
+        Увеличивает счётчики (posts, comments, media_bytes, failed_threads) и запоминает текущий offset_id.
+        """
+        for name, value in counters.items():
+            self.counters[name] += value
+        if offset_id is not None:
+            self.offset_id = offset_id
+        if total is not None:
+            self.total = total
+
+    def snapshot(self, event: str, **extra) -> dict:
+        elapsed = time.monotonic() - self._started
+        return {
+            "task_id": self.task_id,
+            "event": event,
+            **self.counters,
+            "offset_id": self.offset_id,
+            "total": self.total,
+            "rate": round(self.counters["posts"] / elapsed, 2) if elapsed else 0.0,
+            "elapsed": round(elapsed, 1),
+            **extra,
+        }
+
+    async def publish(self, event: str = "progress", force: bool = False, **extra) -> None:
+        """
+        Публикует снимок счётчиков, если с прошлой публикации прошло interval секунд или force=True.
+        """
+        now = time.monotonic()
+        if not force and now - self._published < self.interval:
+            return
+        self._published = now
+
+        payload = json.dumps(self.snapshot(event, **extra))
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.publish(self.channel(self.task_id), payload)
+            pipe.set(self.task_id, payload, ex=self.ttl)
+            await pipe.execute()
+
+
+async def subscribe(
+    redis: Redis,
+    task_id: str,
+    keepalive: float,
+    task_state: Callable[[], str | None] | None = None
+) -> AsyncIterator[dict | None]:
+    """
+    Отдаёт события задачи до события done или error.
+    Если за keepalive секунд событий не было, отдаёт None.
+
+    :param task_state: Возвращает состояние задачи, если она уже завершилась, иначе None.
+        Проверяется при каждом keepalive, чтобы поток закрылся, даже если задача
+        завершилась без события done или error.
+    """
+    pubsub = redis.pubsub()
+    await pubsub.subscribe(ProgressReporter.channel(task_id))
+    try:
+        # Снимок читается после подписки, чтобы между ними не потерять события
+        last = await redis.get(task_id)
+        if last:
+            event = json.loads(last)
+            yield event
+            if event["event"] in ("done", "error"):
+                return
+
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=keepalive)
+            if message is None:
+                state = task_state() if task_state else None
+                if state is not None:
+                    yield {"task_id": task_id, "event": "done" if state == "SUCCESS" else "error", "state": state}
+                    return
+                yield None
+                continue
+
+            event = json.loads(message["data"])
+            yield event
+            if event["event"] in ("done", "error"):
+                return
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
+
+
+progress_redis = Redis(host=Config().REDIS_HOST, port=Config().REDIS_PORT, db=1)
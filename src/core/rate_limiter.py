@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from redis.asyncio import Redis
+from telethon.errors import FloodWaitError
+
+from src.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+# Токен-бакет с адаптивной скоростью. Возвращает 0, если токен получен,
+# положительное число миллисекунд до появления токена,
+# или отрицательное число миллисекунд оставшейся заморозки аккаунта.
+ACQUIRE_SCRIPT = """
+local cooldown = redis.call('PTTL', KEYS[2])
+if cooldown > 0 then
+    return -cooldown
+end
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local default_rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local max_rate = tonumber(ARGV[3])
+local step = tonumber(ARGV[4])
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'rate')
+local rate = tonumber(bucket[3]) or default_rate
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+
+tokens = math.min(burst, tokens + (now - ts) / 1000 * rate)
+if tokens < 1 then
+    return math.ceil((1 - tokens) / rate * 1000)
+end
+
+rate = math.min(max_rate, rate + step)
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens - 1), 'ts', now, 'rate', tostring(rate))
+redis.call('EXPIRE', KEYS[1], 86400)
+return 0
+"""
+
+# Замораживает аккаунт на ARGV[1] секунд и вдвое снижает скорость метода.
+FLOOD_SCRIPT = """
+redis.call('SET', KEYS[2], 1, 'EX', ARGV[1])
+local rate = tonumber(redis.call('HGET', KEYS[1], 'rate')) or tonumber(ARGV[2])
+redis.call('HSET', KEYS[1], 'rate', tostring(math.max(tonumber(ARGV[3]), rate / 2)), 'tokens', '0')
+redis.call('EXPIRE', KEYS[1], 86400)
+return 1
+"""
+
+
+class AccountCooldownError(Exception):
+    def __init__(self, account_id: int, seconds: int):
+        super().__init__(f"Аккаунт {account_id} заморожен ещё на {seconds} с")
+        self.account_id = account_id
+        self.seconds = seconds
+
+
+class RateLimiter:
+    """
+    Общий для всех воркеров ограничитель запросов к Telegram на Redis.
+
+    Для каждой пары (аккаунт, метод) хранится токен-бакет. Скорость бакета растёт
+    на RATE_LIMIT_STEP с каждым успешным запросом до RATE_LIMIT_MAX и падает вдвое
+    после FloodWait, поэтому темп подстраивается под реальные лимиты Telegram.
+    FloodWait также замораживает аккаунт ровно на требуемое число секунд. Пока
+    заморозка действует, acquire() бросает AccountCooldownError, чтобы задачу
+    можно было перенести на другой аккаунт.
+    """
+
+    def __init__(self, redis: Redis, config: Config):
+        self.redis = redis
+        self.rate = config.RATE_LIMIT_RATE
+        self.burst = config.RATE_LIMIT_BURST
+        self.max_rate = config.RATE_LIMIT_MAX
+        self.min_rate = config.RATE_LIMIT_MIN
+        self.step = config.RATE_LIMIT_STEP
+        self._acquire = redis.register_script(ACQUIRE_SCRIPT)
+        self._flood = redis.register_script(FLOOD_SCRIPT)
+
+    @staticmethod
+    def _keys(account_id: int, method: str) -> list[str]:
+        return [f"ratelimit:{account_id}:{method}", f"cooldown:{account_id}"]
+
+    async def acquire(self, account_id: int, method: str) -> None:
+        """
+        Ожидает свободный токен для запроса method от аккаунта.
+        """
+        while True:
+            wait = await self._acquire(
+                keys=self._keys(account_id, method),
+                args=[self.rate, self.burst, self.max_rate, self.step]
+            )
+            if wait == 0:
+                return
+            if wait < 0:
+                raise AccountCooldownError(account_id, -wait // 1000 + 1)
+            await asyncio.sleep(wait / 1000)
+
+    async def flood_wait(self, account_id: int, method: str, seconds: int) -> None:
+        """
+        Учитывает FloodWait: замораживает аккаунт и снижает скорость метода.
+        """
+        logger.warning(f"FloodWait {seconds} с для аккаунта {account_id} на {method}")
+        await self._flood(keys=self._keys(account_id, method), args=[seconds, self.rate, self.min_rate])
+
+    @asynccontextmanager
+    async def guard(self, account_id: int, method: str) -> AsyncIterator[None]:
+        """
+        Выполняет блок запросов к Telegram с ограничением скорости и учётом FloodWait.
+        """
+        await self.acquire(account_id, method)
+        try:
+            yield
+        except FloodWaitError as e:
+            await self.flood_wait(account_id, method, e.seconds)
+            raise
+
+
+rate_limiter = RateLimiter(Redis(host=Config().REDIS_HOST, port=Config().REDIS_PORT, db=1), Config())
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRuntime:
+    """
+    Долгоживущий цикл событий процесса, работающий в фоновом потоке.
+
+    Задачи Celery из потоков пула передают в него корутины через run(), поэтому
+    один процесс ведёт много I/O-задач одновременно и делит между ними клиентов
+    из ClientPool. Одновременно выполняется не больше concurrency корутин.
+    Цикл запускается лениво, уже в дочернем процессе после fork.
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    def start(self) -> None:
+        """
+        Запускает цикл событий, если он ещё не запущен.
+        """
+        with self._lock:
+            if self._loop is not None:
+                return
+
+            loop = asyncio.new_event_loop()
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._thread = threading.Thread(target=self._serve, args=(loop,), name="async-runtime", daemon=True)
+            self._thread.start()
+            self._loop = loop
+            logger.info(f"Цикл событий процесса запущен, лимит задач: {self.concurrency}")
+
+    @staticmethod
+    def _serve(loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    async def _limited(self, coro: Coroutine) -> Any:
+        async with self._semaphore:
+            return await coro
+
+    def submit(self, coro: Coroutine) -> Future:
+        """
+        Ставит корутину на выполнение в цикле процесса.
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._limited(coro), self._loop)
+
+    def run(self, coro: Coroutine) -> Any:
+        """
+        Выполняет корутину в цикле процесса и блокирует вызывающий поток до результата.
+        """
+        return self.submit(coro).result()
+
+    def stop(self) -> None:
+        """
+        Останавливает цикл событий и ждёт завершения его потока.
+        """
+        with self._lock:
+            if self._loop is None:
+                return
+
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = self._thread = None
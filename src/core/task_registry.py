@@ -0,0 +1,178 @@
+import time
+
+from redis import Redis
+
+from src.core.config import Config
+
+
+FIELDS = ("task_id", "name", "channel", "status", "progress", "submitted_at", "updated_at")
+
+
+class TaskRegistry:
+    """
+    Индекс задач Celery в Redis вместо сканирования ключей celery-task-meta-*.
+
+    tasks — sorted set id задач по времени постановки, task:{id} — hash с метаданными задачи.
+    Дополнительные sorted set tasks:status:{status} и tasks:channel:{channel} служат индексами
+    для фильтров, их имена хранятся в set tasks:indexes. Записи старше ttl удаляются из всех
+    индексов при регистрации новых задач,
+    а hash задачи истекает сам; ссылки индексов на истёкшие задачи также вычищаются при чтении.
+    """
+
+    def __init__(self, redis: Redis, ttl: int):
+        self.redis = redis
+        self.ttl = ttl
+
+    @staticmethod
+    def _task_key(task_id: str) -> str:
+        return f"task:{task_id}"
+
+    INDEXES = "tasks:indexes"
+
+    @staticmethod
+    def _index_key(status: str | None = None, channel: str | None = None) -> str:
+        if channel:
+            return f"tasks:channel:{channel}"
+        if status:
+            return f"tasks:status:{status}"
+        return "tasks"
+
+    def register(self, task_id: str, name: str, channel: str | None = None) -> None:
+        """
+        Регистрирует поставленную в очередь задачу.
+        """
+        now = time.time()
+        pipe = self.redis.pipeline()
+        pipe.hset(self._task_key(task_id), mapping={
+            "task_id": task_id,
+            "name": name,
+            "channel": channel or "",
+            "status": "PENDING",
+            "submitted_at": now,
+            "updated_at": now,
+        })
+        pipe.expire(self._task_key(task_id), self.ttl)
+        pipe.zadd(self._index_key(), {task_id: now})
+        indexes = [self._index_key(status="PENDING")]
+        if channel:
+            indexes.append(self._index_key(channel=channel))
+        for index in indexes:
+            pipe.zadd(index, {task_id: now})
+        pipe.sadd(self.INDEXES, *indexes)
+
+        # Индексы статусов и каналов чистятся вместе с основным, иначе редко читаемые
+        # индексы (например, старых каналов) росли бы без ограничений
+        known = sorted({index.decode() for index in self.redis.smembers(self.INDEXES)} | set(indexes))
+        pipe.zremrangebyscore(self._index_key(), "-inf", now - self.ttl)
+        for index in known:
+            pipe.zremrangebyscore(index, "-inf", now - self.ttl)
+            pipe.zcard(index)
+        results = pipe.execute()
+
+        # Опустевшие индексы Redis удаляет сам, из списка индексов их убираем явно
+        empty = [index for index, card in zip(known, results[-2 * len(known) + 1::2]) if card == 0]
+        if empty:
+            self.redis.srem(self.INDEXES, *empty)
+
+    def set_status(self, task_id: str, status: str, **fields) -> None:
+        """
+        Обновляет статус задачи и переносит её в индекс нового статуса.
+        Незарегистрированные задачи (например, шарды обхода) пропускаются.
+        """
+        key = self._task_key(task_id)
+        current, submitted_at = self.redis.hmget(key, "status", "submitted_at")
+        if current is None:
+            return
+
+        pipe = self.redis.pipeline()
+        pipe.hset(key, mapping={"status": status, "updated_at": time.time(), **fields})
+        if current.decode() != status:
+            pipe.zrem(self._index_key(status=current.decode()), task_id)
+            pipe.zadd(self._index_key(status=status), {task_id: float(submitted_at)})
+            pipe.sadd(self.INDEXES, self._index_key(status=status))
+        pipe.execute()
+
+    @staticmethod
+    def encode_cursor(score: float, task_id: str) -> str:
+        return f"{score!r}:{task_id}"
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[float, str]:
+        """
+        Бросает ValueError, если курсор повреждён.
+        """
+        score, separator, task_id = cursor.partition(":")
+        if not separator or not task_id:
+            raise ValueError(f"Некорректный курсор: {cursor}")
+        try:
+            return float(score), task_id
+        except ValueError as e:
+            raise ValueError(f"Некорректный курсор: {cursor}") from e
+
+    def _skip(self, index: str, score: float, task_id: str) -> int:
+        """
+        Возвращает число записей с временем score и id не меньше task_id: в порядке
+        zrevrangebyscore они идут первыми и уже были отданы на предыдущих страницах.
+        """
+        members = self.redis.zrangebyscore(index, score, score)
+        return sum(1 for member in members if member.decode() >= task_id)
+
+    def page(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        status: str | None = None,
+        channel: str | None = None
+    ) -> tuple[list[dict], str | None]:
+        """
+        Возвращает страницу задач от новых к старым и курсор следующей страницы.
+
+        Курсор — пара (время постановки, id) последней задачи страницы: задачи с одинаковым
+        временем упорядочены по id, поэтому ни одна из них не теряется на границе страниц.
+
+        :param cursor: next_cursor предыдущей страницы.
+        :param status: Фильтр по статусу.
+        :param channel: Фильтр по каналу; вместе со status статус проверяется по метаданным задачи.
+        :return: (задачи, курсор) — курсор None, если страниц больше нет.
+        """
+        index = self._index_key(status, channel)
+        last = self.decode_cursor(cursor) if cursor is not None else None
+        tasks: list[dict] = []
+
+        while len(tasks) < limit:
+            if last is None:
+                max_score, skip = "+inf", 0
+            else:
+                max_score, skip = last[0], self._skip(index, *last)
+            entries = self.redis.zrevrangebyscore(
+                index, max_score, "-inf", start=skip, num=limit - len(tasks), withscores=True
+            )
+            if not entries:
+                return tasks, None
+
+            pipe = self.redis.pipeline(transaction=False)
+            for task_id, _ in entries:
+                pipe.hmget(self._task_key(task_id.decode()), *FIELDS)
+            rows = pipe.execute()
+
+            expired = []
+            for (task_id, _), row in zip(entries, rows):
+                if row[0] is None:
+                    expired.append(task_id)
+                    continue
+                task = {field: value.decode() if value is not None else None for field, value in zip(FIELDS, row)}
+                if channel and status and task["status"] != status:
+                    continue
+                tasks.append(task)
+
+            if expired:
+                self.redis.zrem(index, *expired)
+            last = (entries[-1][1], entries[-1][0].decode())
+
+        return tasks, self.encode_cursor(*last)
+
+
+task_registry = TaskRegistry(
+    Redis(host=Config().REDIS_HOST, port=Config().REDIS_PORT, db=1),
+    Config().TASK_REGISTRY_TTL
+)
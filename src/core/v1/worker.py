@@ -1,11 +1,17 @@
 import logging
 from telethon import TelegramClient
+from telethon.errors import FloodWaitError
 from telethon.tl.types import User
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.utils.utils import process_reactions
+from src.utils.batch import BatchWriter
+from src.utils.utils import message_reactions, comment_to_row
 from src.core.config import Config
-from src.repositories.channel import ChannelRepository
+from src.core.client_pool import client_pool
+from src.core.entity_cache import entity_cache
+from src.core.leases import account_leaser
+from src.core.rate_limiter import rate_limiter, AccountCooldownError
+from src.db.models import Account
 from src.repositories.post import PostRepository
 from src.repositories.comment import CommentRepository
 from src.repositories.account import AccountRepository
@@ -17,7 +23,7 @@ logger = logging.getLogger(__name__)
 
 
 class Worker:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
         self.account_repo = AccountRepository(session)
         self.proxy_repo = ProxyRepository(session)
@@ -26,27 +32,11 @@ class Worker:
         self.api_id = Config().API_ID
         self.api_hash = Config().API_HASH
 
-    async def get_client(self) -> TelegramClient | None:
-        account = self.account_repo.get_account()
-
-        if account is None:
-            return None
-        
-        self.account_repo.increment_account_requests(account)
-        # proxy = self.proxy_repo.get_proxy_by_id(account.proxy_id)
-        
-        session_file = f'{Config().SESSIONS_DIR}/{account.login}.session'
-
-        logger.info(session_file)
-        
-        client = TelegramClient(session_file, self.api_id, self.api_hash)
-
-        logger.info(client)
-
+    async def get_client(self, account: Account) -> TelegramClient | None:
         try:
 
             logger.info('Start client connecting')
-            await client.connect()
+            client = await client_pool.acquire(account)
 
             logger.info(f'Client connected {client}')
 
@@ -57,75 +47,98 @@ class Worker:
             if isinstance(me, User):
                 return client
             else:
-                self.account_repo.set_banned(account)
+                await self.account_repo.set_banned(account)
                 return None
         except Exception as e:
             logger.error(f'Error connecting to Telegram: {e}')
             return None
 
-    async def get_post_info(self, client: TelegramClient, channel_name: str, message_id: int):
-        message = await client.get_messages(await client.get_entity(channel_name), ids=message_id)
-        data = message.reactions.results if message and message.reactions else []
-        reactions = [(item.reaction.emoticon, item.count) for item in data]
-        reactions_pairs = process_reactions(reactions)
-        
-        self.post_repo.create_post(
-            message_id,
-            int(message.peer_id.channel_id),
-            f't.me/{channel_name}/{message_id}',
-            message.text,
-            f'{Config().MEDIA_DIR}{message_id}',
-            reactions_pairs,
-            message.date
+    async def get_post_info(self, client: TelegramClient, account_id: int, channel_name: str, message_id: int):
+        channel = await entity_cache.resolve(client, account_id, channel_name)
+        async with rate_limiter.guard(account_id, "GetMessages"):
+            message = await client.get_messages(channel, ids=message_id)
+
+        await self.post_repo.create_post(
+            post_id=message_id,
+            url=f'https://t.me/{channel_name}/{message_id}',
+            text=message.text,
+            media=f'{Config().MEDIA_DIR}{message_id}',
+            date=message.date,
+            channel_id=int(message.peer_id.channel_id),
+            reactions=message_reactions(message)
         )
 
-    async def get_comments_info(self, client: TelegramClient, message_id: str, channel_name: str, limit: int, reverse: bool):
-        async for comment in client.iter_messages(
-                entity=await client.get_entity(channel_name),
-                reply_to=int(message_id),
-                limit=limit,
-                reverse=reverse,
-                wait_time=1):
-            try:
-                self.comment_repo.create_comment(
-                    comment.id, message_id, comment.text, comment.from_id.user_id, comment.date)
-            except AttributeError:
-                self.comment_repo.create_comment(
-                    comment.id, message_id, comment.text, f'channel_id:{comment.peer_id.channel_id}', comment.date)
+    async def get_comments_info(
+        self,
+        client: TelegramClient,
+        account_id: int,
+        message_id: str,
+        channel_name: str,
+        limit: int,
+        reverse: bool
+    ):
+        channel = await entity_cache.resolve(client, account_id, channel_name)
+        async with BatchWriter(
+                self.comment_repo.create_comments,
+                size=Config().COMMENTS_BATCH_SIZE,
+                interval=Config().BATCH_FLUSH_INTERVAL) as batch:
+            async with rate_limiter.guard(account_id, "GetReplies"):
+                async for comment in client.iter_messages(
+                        entity=channel,
+                        reply_to=int(message_id),
+                        limit=limit,
+                        reverse=reverse):
+                    await batch.add(comment_to_row(comment, channel.id, int(message_id)))
 
     async def get_comments(self, tasks: CollectReqModel):
         limit = tasks.limit
         reverse = tasks.asc
         
-        for task in tasks.data:
-            channel_name, message_id = task.url.split('/')[-2:]
-            client = await self.get_client()
-            
+        pending = list(tasks.data)
+        attempts = 0
+
+        # При FloodWait аккаунт замораживается, а оставшиеся ссылки переходят к другому аккаунту.
+        # Если клиент не подключился, ссылка остаётся в очереди для следующего аккаунта
+        while pending:
+            async with account_leaser.lease(self.account_repo) as account:
+                client = await self.get_client(account)
+
+                if client is None:
+                    attempts += 1
+                    logger.info('Client is None')
+                    if attempts >= Config().COLLECT_MAX_ATTEMPTS:
+                        logger.error(f"Ссылка {pending[0].url} пропущена: не удалось подключить клиент за {attempts} попыток")
+                        pending.pop(0)
+                        attempts = 0
+                    continue
+
+                attempts = 0
+
+                while pending:
+                    channel_name, message_id = pending[0].url.split('/')[-2:]
+                    try:
+                        await self.get_post_info(client, account.id, channel_name, int(message_id))
+                        await self.get_comments_info(client, account.id, message_id, channel_name, limit, reverse)
+                    except (FloodWaitError, AccountCooldownError) as e:
+                        await account_leaser.cooldown(self.account_repo, account.id, e.seconds)
+                        break
+                    except Exception as e:
+                        logger.error(str(e))
+
+                    pending.pop(0)
+
+    async def get_last_post_id(self, url: str) -> int | None:
+        async with account_leaser.lease(self.account_repo) as account:
+            client = await self.get_client(account)
+
             if client:
                 try:
-                    await client.connect()
-                    await self.get_post_info(client, channel_name, int(message_id))
-                    await self.get_comments_info(client, message_id, channel_name, limit, reverse)
+                    async with rate_limiter.guard(account.id, "GetHistory"):
+                        res = await client.get_messages(url, limit=1)
+                    return int(res[0].id) if res else None
                 except Exception as e:
                     logger.error(str(e))
-                
-                finally:
-                    await client.disconnect()
+                    return None
             else:
                 logger.info('Client is None')
-
-    async def get_last_post_id(self, url: str) -> int | None:
-        client = await self.get_client()
-        
-        if client:
-            try:
-                await client.connect()
-                res = await client.get_messages(url, limit=1)
-                await client.disconnect()
-                return int(res[0].id) if res else None
-            except Exception as e:
-                logger.error(str(e))
                 return None
-        else:
-            logger.info('Client is None')
-            return None
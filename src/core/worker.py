@@ -1,26 +1,57 @@
+import asyncio
 import logging
 import os
-import socks
-import json
 import glob
 
 from datetime import datetime, timezone
+from functools import partial
+from typing import Callable
 
 from telethon import TelegramClient
-from telethon.tl.types import Message, Channel, ReactionCustomEmoji
+from telethon.tl.types import Message, Channel
+from telethon.errors import FloodWaitError, ChannelInvalidError, ChannelPrivateError
 from telethon.tl.functions.channels import JoinChannelRequest
 
 
 from src.repositories.post import PostRepository
 from src.repositories.comment import CommentRepository
+from src.repositories.post_metrics import PostMetricsRepository
+from src.repositories.channel_sync import ChannelSyncRepository
+from src.repositories.checkpoint import CheckpointRepository
 from src.core.config import Config
+from src.core.client_pool import build_client
+from src.core.entity_cache import entity_cache
+from src.core.progress import ProgressReporter
+from src.core.rate_limiter import rate_limiter, AccountCooldownError
 from src.db.models import Account
+from src.dependencies import get_db
+from src.utils.batch import BatchWriter
+from src.utils.pool import TaskPool
+from src.utils.utils import comment_to_row, comments_min_id, content_hash, media_file_id, message_metrics, message_reactions
 
 logger = logging.getLogger(__name__)
 
+# channels.getMessages принимает не больше 100 id за вызов
+MESSAGES_PER_REQUEST = 100
+
+# Общий для всех обходов процесса предел веток комментариев, держащих сессию БД:
+# COMMENTS_CONCURRENCY ограничивает ветки одного обхода, а их в процессе до TASKS_PER_PROCESS
+harvest_slots = asyncio.Semaphore(Config().COMMENTS_PROCESS_CONCURRENCY)
+
 
 class Worker:
-    def __init__(self, post_repo: PostRepository, account: Account, comment_repo: CommentRepository):
+    def __init__(
+        self,
+        post_repo: PostRepository,
+        account: Account,
+        comment_repo: CommentRepository,
+        sync_repo: ChannelSyncRepository | None = None,
+        checkpoint_repo: CheckpointRepository | None = None,
+        on_progress: Callable[[int, int | None], None] | None = None,
+        client: TelegramClient | None = None,
+        progress: ProgressReporter | None = None,
+        refresh: bool = False
+    ):
         """
         Инициализация Worker.
         
@@ -28,63 +59,436 @@ class Worker:
         :param api_id: Ваш api_id из my.telegram.org.
         :param api_hash: Ваш api_hash.
         :param session_name: Имя файла сессии Telethon.
+        :param on_progress: Вызывается с (processed, total) после записи каждой пачки постов.
+            Может блокировать (например, писать в Redis синхронным клиентом), поэтому
+            выполняется в потоке, а не в общем цикле событий.
+        :param client: Подключённый клиент из ClientPool. Его подключением управляет пул,
+            поэтому connect/disconnect для него ничего не делают.
+        :param progress: Публикует события хода обхода в Redis pub/sub.
+        :param refresh: Обновлять уже сохранённые посты и комментарии, если они изменились,
+            и не скачивать заново медиа, которое уже есть на диске.
         """
         self.config = Config()
 
-        self.session_name = f'{self.config.SESSIONS_DIR}/{account.login}.session'
-
-        self.proxy = (
-            socks.HTTP, 
-            account.proxy.addr, 
-            account.proxy.port, 
-            True,
-            account.proxy.username, 
-            account.proxy.password
-            )
-        
+        self.account_id = account.id
         self.post_repo = post_repo  # Инициализация репозитория постов
 
         self.comment_repo = comment_repo
+        self.metrics_repo = PostMetricsRepository(post_repo.db)
+        self.sync_repo = sync_repo
+        self.checkpoint_repo = checkpoint_repo
+        self.on_progress = on_progress
+        self.progress = progress
+        self.refresh = refresh
         self.api_id = self.config.API_ID
         self.api_hash = self.config.API_HASH
         self.media_dir = self.config.MEDIA_DIR
 
-        self.client = TelegramClient(self.session_name, self.api_id, self.api_hash, proxy=self.proxy)
+        self.owns_client = client is None
+        self.client = client or build_client(account)
+
+        # Ветки комментариев собираются в фоне, пока основной цикл читает канал.
+        # FloodWait и заморозка аккаунта в ветке прерывают обход, чтобы сработали
+        # повтор задачи и охлаждение аккаунта; остальные ошибки веток учитываются в failed
+        self.comment_pool = TaskPool(
+            self.config.COMMENTS_CONCURRENCY,
+            fatal=(FloodWaitError, AccountCooldownError),
+            on_failure=self.on_thread_failure
+        )
+
+    def on_thread_failure(self, error: BaseException) -> None:
+        """
+        Учитывает ветку комментариев, которую не удалось собрать.
+        """
+        if self.progress:
+            self.progress.add(failed_threads=1)
+
+    def guard(self, method: str):
+        """
+        Ограничивает скорость запросов method от аккаунта воркера и учитывает FloodWait.
+        """
+        return rate_limiter.guard(self.account_id, method)
 
     async def connect(self):
         """Подключение к Telegram через Telethon."""
+        if not self.owns_client:
+            return
         await self.client.start()
         logger.info("Подключение к Telegram успешно.")
 
     async def disconnect(self):
         """Отключение от Telegram."""
+        if not self.owns_client:
+            return
         await self.client.disconnect()
         logger.info("Отключение от Telegram выполнено.")
 
-    async def fetch_channel_posts(self, channel_link: str, limit: int):
+    async def fetch_channel_posts(
+        self,
+        channel_link: str,
+        limit: int,
+        batch_size: int | None = None,
+        incremental: bool = False,
+        crawl_id: str | None = None,
+        min_id: int = 0,
+        offset_id: int = 0,
+        since: datetime | None = None
+    ) -> int:
         """
         Получает сообщения из канала по ссылке и сохраняет их в базу данных через PostRepository.
-        
+
+        Сообщения накапливаются пачками по batch_size штук, каждая пачка записывается
+        одной многострочной вставкой.
+
+        В инкрементальном режиме читаются только сообщения новее водяного знака канала
+        из ChannelSyncRepository. Они идут от старых к новым, и водяной знак сдвигается
+        в одной транзакции с каждой записанной пачкой. Если канал ещё не синхронизировался,
+        читаются последние limit сообщений, а водяной знак ставится после их записи.
+
+        Если передан crawl_id, каждые CHECKPOINT_EVERY сообщений offset_id и счётчики обхода
+        сохраняются в CheckpointRepository. Повторный запуск с тем же crawl_id продолжает
+        обход с последней контрольной точки.
+
+        min_id и offset_id ограничивают окно id сообщений (min_id, offset_id) для
+        шардированного обхода одного канала несколькими аккаунтами.
+
+        since останавливает обход от новых сообщений к старым на первом сообщении старше since.
+
         :param channel_link: Ссылка на Telegram-канал (например, "https://t.me/some_channel").
+        :param batch_size: Размер пачки постов (по умолчанию POSTS_BATCH_SIZE).
+        :param incremental: Собирать только новые сообщения.
+        :param crawl_id: Идентификатор обхода для контрольных точек.
+        :param min_id: Нижняя граница окна id сообщений (не включается).
+        :param offset_id: Верхняя граница окна id сообщений (не включается).
+        :param since: Время самого старого сообщения обхода.
+        :return: Количество обработанных сообщений.
         """
         try:
-            channel = await self.client.get_entity(channel_link)
+            channel = await entity_cache.resolve(self.client, self.account_id, channel_link)
+        except (FloodWaitError, AccountCooldownError):
+            raise
         except Exception as e:
             logger.error(f"Ошибка получения канала {channel_link}: {e}")
-            return
+            return 0
 
         logger.info(f"Начало сбора постов из канала: {getattr(channel, 'title', channel.id)}")
 
-        # Итерация по сообщениям канала
-        async for message in self.client.iter_messages(channel, limit=limit):
+        batch_size = batch_size or self.config.POSTS_BATCH_SIZE
+        if incremental:
+            min_id = await self.sync_repo.get_last_message_id(channel.id)
+        advance = incremental and bool(min_id)
+        newest_id = 0
+        rows, messages = [], []
+
+        # Контрольные точки имеют смысл только при обходе от новых сообщений к старым
+        crawl_id = crawl_id if not advance else None
+        checkpoint = await self.checkpoint_repo.get_checkpoint(crawl_id) if crawl_id else None
+        if checkpoint and checkpoint.status == "done":
+            logger.info(f"Обход {crawl_id} уже завершён")
+            return checkpoint.processed
+
+        offset_id = checkpoint.offset_id if checkpoint else offset_id
+        processed = saved = checkpoint.processed if checkpoint else 0
+        if checkpoint:
+            logger.info(f"Продолжение обхода {crawl_id} с offset_id={offset_id}, обработано {processed}")
+
+        try:
+            await rate_limiter.acquire(self.account_id, "GetHistory")
+
+            # Итерация по сообщениям канала
+            async for message in self.iter_history(
+                    channel,
+                    limit=max(limit - processed, 0) if limit else limit,
+                    min_id=min_id,
+                    offset_id=offset_id,
+                    reverse=advance):
+                if not message:
+                    continue
+                if since and not advance and message.date < since:
+                    break
+
+                rows.append(await self.build_post_row(message, channel))
+                messages.append(message)
+                newest_id = max(newest_id, message.id)
+
+                if len(rows) >= batch_size:
+                    await self.flush_posts(rows, messages, channel, advance)
+                    processed += len(rows)
+                    offset_id = messages[-1].id
+                    rows, messages = [], []
+                    await self.report_progress(processed, limit, offset_id)
+
+                    if crawl_id and processed - saved >= self.config.CHECKPOINT_EVERY:
+                        await self.checkpoint_repo.save_checkpoint(crawl_id, channel_link, offset_id, processed, limit)
+                        saved = processed
+
+                    # Одна пачка примерно соответствует одному запросу истории
+                    await rate_limiter.acquire(self.account_id, "GetHistory")
+
+            await self.flush_posts(rows, messages, channel, advance)
+            processed += len(rows)
+            await self.report_progress(processed, limit, messages[-1].id if messages else offset_id)
+            await self.comment_pool.join()
+        except BaseException as e:
+            if isinstance(e, (ChannelInvalidError, ChannelPrivateError)):
+                # access_hash из кэша устарел: при повторе канал будет разрешён заново
+                await entity_cache.invalidate(self.account_id, channel_link)
+            # Сохраняем уже собранные посты, чтобы не потерять их при ошибке или остановке
+            if await self.save_posts(rows, channel, advance) and rows:
+                processed += len(rows)
+                offset_id = messages[-1].id
+            if crawl_id:
+                await self.checkpoint_repo.save_checkpoint(crawl_id, channel_link, offset_id, processed, limit)
+            await self.comment_pool.cancel()
+            raise
+
+        if crawl_id:
+            await self.checkpoint_repo.save_checkpoint(crawl_id, channel_link, offset_id, processed, limit, status="done")
+
+        if incremental and not advance and newest_id:
+            await self.sync_repo.advance(channel.id, getattr(channel, "username", None), newest_id)
+
+        return processed
+
+    async def fetch_messages(
+        self,
+        channel_link: str,
+        message_ids: list[int],
+        comments_limit: int = 100,
+        comments_reverse: bool = False
+    ) -> int:
+        """
+        Получает сообщения канала по списку id и сохраняет их вместе с комментариями.
+
+        Канал разрешается один раз, сообщения запрашиваются одним get_messages на каждые
+        MESSAGES_PER_REQUEST id и записываются пачкой, а ветки комментариев собираются
+        параллельно в пуле фоновых задач.
+
+        :param channel_link: Ссылка на канал или его username.
+        :param message_ids: id сообщений канала.
+        :param comments_limit: Максимальное количество комментариев к посту при первом сборе его ветки.
+        :param comments_reverse: Собирать комментарии от старых к новым.
+        :return: Количество сохранённых сообщений.
+        """
+        try:
+            channel = await entity_cache.resolve(self.client, self.account_id, channel_link)
+        except (FloodWaitError, AccountCooldownError):
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка получения канала {channel_link}: {e}")
+            return 0
+
+        processed = 0
+        try:
+            for start in range(0, len(message_ids), MESSAGES_PER_REQUEST):
+                async with self.guard("GetMessages"):
+                    messages = await self.client.get_messages(
+                        channel, ids=message_ids[start:start + MESSAGES_PER_REQUEST]
+                    )
+                # Удалённые и недоступные сообщения приходят как None
+                messages = [message for message in messages if message]
+
+                rows = [await self.build_post_row(message, channel) for message in messages]
+                await self.flush_posts(
+                    rows, messages, channel,
+                    comments_limit=comments_limit, comments_reverse=comments_reverse
+                )
+                processed += len(rows)
+                await self.report_progress(processed, len(message_ids), messages[-1].id if messages else None)
+
+            await self.comment_pool.join()
+        except BaseException as e:
+            if isinstance(e, (ChannelInvalidError, ChannelPrivateError)):
+                await entity_cache.invalidate(self.account_id, channel_link)
+            await self.comment_pool.cancel()
+            raise
+
+        return processed
+
+    async def sample_metrics(self, channel_link: str, since: datetime, batch_size: int | None = None) -> int:
+        """
+        Записывает снимки метрик постов канала, опубликованных после since.
+
+        В отличие от обхода в режиме refresh, посты и комментарии не перезаписываются,
+        медиа не скачивается, а ветки комментариев не перечитываются: из истории
+        берутся только счётчики, и снимок пишется лишь для постов, у которых они изменились.
+
+        :return: Количество просмотренных сообщений.
+        """
+        channel = await entity_cache.resolve(self.client, self.account_id, channel_link)
+        batch_size = batch_size or self.config.POSTS_BATCH_SIZE
+        messages: list[Message] = []
+        processed = 0
+
+        async def flush():
+            if messages:
+                await self.metrics_repo.record(
+                    [
+                        {"channel_id": channel.id, "post_id": message.id, "metrics": message_metrics(message)}
+                        for message in messages
+                    ],
+                    datetime.now(timezone.utc),
+                    min(message.date for message in messages)
+                )
+
+        await rate_limiter.acquire(self.account_id, "GetHistory")
+        async for message in self.iter_history(channel):
             if not message:
                 continue
+            if message.date < since:
+                break
+            messages.append(message)
+            if len(messages) >= batch_size:
+                await flush()
+                processed += len(messages)
+                messages = []
+                await self.report_progress(processed, None, message.id)
+                await rate_limiter.acquire(self.account_id, "GetHistory")
 
-            await self.process_message(message, channel)
+        await flush()
+        processed += len(messages)
+        await self.report_progress(processed, None, messages[-1].id if messages else None)
+        return processed
 
-    async def process_message(self, message: Message, channel: Channel):
+    async def iter_history(self, channel: Channel, **kwargs):
+        """
+        Итерирует iter_messages канала и учитывает FloodWait запросов истории в ограничителе.
+
+        Запросы GetHistory выполняются внутри итератора между пачками, поэтому guard нельзя
+        держать открытым на весь обход: FloodWait из тела цикла (медиа, комментарии) уже
+        учтён под своим методом и не должен замораживать GetHistory повторно.
+        """
+        messages = self.client.iter_messages(channel, **kwargs).__aiter__()
+        while True:
+            try:
+                message = await messages.__anext__()
+            except StopAsyncIteration:
+                return
+            except FloodWaitError as e:
+                await rate_limiter.flood_wait(self.account_id, "GetHistory", e.seconds)
+                raise
+            yield message
+
+    async def get_last_post_id(self, channel_link: str) -> int | None:
+        """
+        Возвращает id последнего сообщения канала.
+        """
+        channel = await entity_cache.resolve(self.client, self.account_id, channel_link)
+        async with self.guard("GetHistory"):
+            messages = await self.client.get_messages(channel, limit=1)
+        return int(messages[0].id) if messages else None
+
+    async def report_progress(self, processed: int, total: int | None, offset_id: int | None = None) -> None:
+        """
+        Сообщает о ходе обхода через on_progress и публикует событие прогресса.
+        """
+        if self.on_progress:
+            await asyncio.to_thread(self.on_progress, processed, total)
+        if self.progress:
+            self.progress.add(offset_id=offset_id, total=total)
+            await self.progress.publish()
+
+    async def save_posts(self, rows: list[dict], channel: Channel, advance: bool = False) -> bool:
+        """
+        Записывает пачку постов; при advance=True вместе с ней сдвигается водяной знак канала.
+
+        :return: True, если пачка записана.
+        """
+        if not advance or not rows:
+            return await self.post_repo.create_posts(rows, refresh=self.refresh)
+
+        return (
+            await self.post_repo.create_posts(rows, commit=False, refresh=self.refresh)
+            and await self.sync_repo.advance(
+                channel.id,
+                getattr(channel, "username", None),
+                max(row["post_id"] for row in rows)
+            )
+        )
+
+    async def flush_posts(
+        self,
+        rows: list[dict],
+        messages: list[Message],
+        channel: Channel,
+        advance: bool = False,
+        comments_limit: int = 100,
+        comments_reverse: bool = False
+    ):
+        """
+        Записывает пачку постов со снимком их метрик и ставит сбор комментариев к ним в пул фоновых задач.
+
+        Комментарии запрашиваются только для постов, у которых они есть и изменились
+        с прошлой синхронизации, и только с id больше сохранённого replies_max_id.
+        В режиме refresh ветки постов перечитываются целиком.
+        """
+        replies_state = await self.post_repo.get_replies_state(
+            channel.id, [row["post_id"] for row in rows], [row["time"] for row in rows]
+        )
+        if not await self.save_posts(rows, channel, advance):
+            raise RuntimeError(f"Не удалось записать пачку постов канала {channel.id}")
+        if self.progress:
+            self.progress.add(posts=len(rows))
+        if rows:
+            await self.metrics_repo.record(
+                [
+                    {"channel_id": channel.id, "post_id": message.id, "metrics": message_metrics(message)}
+                    for message in messages
+                ],
+                datetime.now(timezone.utc),
+                min(row["time"] for row in rows)
+            )
+
+        for message in messages:
+            if self.refresh and message.replies and message.replies.replies:
+                # При обновлении ветка перечитывается целиком, чтобы найти отредактированные комментарии
+                min_id = 0
+            else:
+                min_id = comments_min_id(message, replies_state.get(message.id))
+            if min_id is not None:
+                await self.comment_pool.submit(
+                    self.harvest_comments(message, channel, min_id, comments_limit, comments_reverse)
+                )
+            logger.info(f"Обработан пост с id: {message.id}")
+
+    async def harvest_comments(
+        self,
+        message: Message,
+        channel: Channel,
+        min_id: int,
+        limit: int = 100,
+        reverse: bool = False
+    ):
+        """
+        Собирает новые комментарии к посту и запоминает состояние его ветки.
+
+        limit ограничивает только первый сбор ветки. При догрузке (min_id > 0) читаются все
+        комментарии выше min_id: иначе при limit новых комментариев более старые из них
+        оказались бы ниже сохранённого replies_max_id и не были бы собраны никогда.
+        Если первый сбор упёрся в limit, сохраняется наибольший прочитанный id, а не
+        max_id ветки, чтобы следующая синхронизация продолжила с него.
+
+        Задачи пула выполняются параллельно с основным циклом, а AsyncSession нельзя
+        использовать из нескольких задач сразу, поэтому у каждой ветки своя сессия.
+        Число таких сессий в процессе ограничено harvest_slots.
+        """
+        if min_id:
+            limit = None
+        async with harvest_slots, get_db() as session:
+            fetched, fetched_max_id = await self.get_comments_info(
+                message, channel, limit=limit, reverse=reverse, min_id=min_id,
+                comment_repo=CommentRepository(session)
+            )
+            max_id = message.replies.max_id
+            if limit is not None and fetched >= limit:
+                max_id = fetched_max_id
+            await PostRepository(session).set_replies_state(
+                channel.id, message.id, message.date, message.replies.replies, max_id
+            )
+
+    async def build_post_row(self, message: Message, channel: Channel) -> dict:
         """
-        Преобразует сообщение Telethon в параметры для создания поста и вызывает метод create_post из PostRepository.
+        Преобразует сообщение Telethon в строку для PostRepository.create_posts, скачивая медиа при наличии.
         """
         # Формирование URL поста, если у канала есть username
         if hasattr(channel, "username") and channel.username:
@@ -103,9 +507,24 @@ class Worker:
             # Например: "1234567_42*" – все файлы, начинающиеся c "{channel.id}_{message.id}"
             file_prefix_pattern = f"{channel.id}_{message.id}*"
             pattern_path = os.path.join(self.media_dir, file_prefix_pattern)
+            old_files = glob.glob(pattern_path)
+
+            # Генерируем «основное» имя файла (без добавления .(1)); id фото или документа
+            # в имени отличает заменённое при редактировании медиа от уже скачанного
+            file_id = media_file_id(message)
+            file_name = f"{channel.id}_{message.id}" + (f"_{file_id}" if file_id else "")
+            file_path = os.path.join(self.media_dir, file_name)
 
+            current = [
+                old_file for old_file in old_files
+                if os.path.splitext(os.path.basename(old_file))[0] == file_name
+            ]
+
+        if message.media and self.refresh and current:
+            # При обновлении то же самое медиа не загружается повторно
+            media_file_path = current[0]
+        elif message.media:
             # Удаляем все старые файлы, которые подходят под шаблон
-            old_files = glob.glob(pattern_path)
             for old_file in old_files:
                 try:
                     os.remove(old_file)
@@ -113,32 +532,40 @@ class Worker:
                 except Exception as ex:
                     logger.error(f"Ошибка при удалении файла {old_file}: {ex}")
 
-            # Генерируем «основное» имя файла (без добавления .(1))
-            file_name = f"{channel.id}_{message.id}"
-            file_path = os.path.join(self.media_dir, file_name)
-
             try:
                 # Скачиваем заново
-                media_file_path = await self.client.download_media(message, file=file_path)
+                async with self.guard("GetFile"):
+                    media_file_path = await self.client.download_media(message, file=file_path)
                 logger.info(f"Медиа заново сохранено: {media_file_path}")
+                if self.progress and media_file_path:
+                    self.progress.add(media_bytes=os.path.getsize(media_file_path))
+            except (FloodWaitError, AccountCooldownError):
+                raise
             except Exception as e:
                 logger.error(f"Ошибка при скачивании медиа для сообщения {message.id}: {e}")
                 media_file_path = ""
 
-        data = message.reactions.results if message and message.reactions else []
-        reactions = [(item.reaction.emoticon, item.count) for item in data if not isinstance(item.reaction, ReactionCustomEmoji)]
-        # Сохранение поста через репозиторий
-        self.post_repo.create_post(
-            post_id=message.id,
-            url=url,
-            text=text,
-            media=media_file_path,
-            date=post_date,
-            channel_id=channel.id,
-            reactions=json.dumps(reactions)
-        )
-        await self.get_comments_info(message, channel, limit=100, reverse=False)
-        logger.info(f"Обработан пост с id: {message.id}")
+        reactions = message_reactions(message)
+
+        return {
+            "post_id": message.id,
+            "url": url,
+            "text": text,
+            "media": media_file_path or "",
+            "time": post_date,
+            "channel_id": channel.id,
+            "channel_name": getattr(channel, "username", None),
+            "reactions": reactions,
+            "reactions_total": sum(reactions.values()),
+            "content_hash": content_hash(text, media_file_path or "", reactions)
+        }
+
+    async def process_message(self, message: Message, channel: Channel):
+        """
+        Сохраняет одно сообщение Telethon как пост и собирает комментарии к нему.
+        """
+        await self.flush_posts([await self.build_post_row(message, channel)], [message], channel)
+        await self.comment_pool.join()
 
 
     async def publish_saved_posts(self, source_channel: str, target_channel: str):
@@ -148,7 +575,7 @@ class Worker:
         :param target_channel: Идентификатор или ссылка на канал, в который будут опубликованы посты.
         """
         # Предполагается, что PostRepository имеет метод get_posts, возвращающий список постов
-        posts = self.post_repo.get_posts_by_channel_name(
+        posts = await self.post_repo.get_posts_by_channel_name(
             channel_name=source_channel
         )
 
@@ -158,48 +585,89 @@ class Worker:
         try:
             for post in posts:
                 try:
-                    if post.media:
-                        # Если есть медиа файл, публикуем его с текстом в качестве подписи
-                        await self.client.send_file(target_channel, post.media, caption=post.text)
-                        logger.info(f"Опубликован пост с медиа: {post.post_id}")
-                    else:
-                        # Публикуем только текст
-                        await self.client.send_message(target_channel, post.text)
-                        logger.info(f"Опубликован текстовый пост: {post.post_id}")
+                    async with self.guard("SendMessage"):
+                        if post.media:
+                            # Если есть медиа файл, публикуем его с текстом в качестве подписи
+                            await self.client.send_file(target_channel, post.media, caption=post.text)
+                            logger.info(f"Опубликован пост с медиа: {post.post_id}")
+                        else:
+                            # Публикуем только текст
+                            await self.client.send_message(target_channel, post.text)
+                            logger.info(f"Опубликован текстовый пост: {post.post_id}")
                 except Exception as e:
                     logger.error(f"Ошибка при публикации поста {post.post_id}: {e}")
         finally:
             await self.disconnect()
 
-    async def get_comments_info(self, message: Message, channel: Channel, limit: int, reverse: bool):
-        async for comment in self.client.iter_messages(
-                entity=channel,
-                reply_to=message.id,
-                limit=limit,
-                reverse=reverse,
-                wait_time=1):
-            try:
-                self.comment_repo.create_comment(
-                    comment.id, message.id, comment.text, comment.from_id.user_id, comment.date)
-            except AttributeError:
-                self.comment_repo.create_comment(
-                    comment.id, message.id, comment.text, f'channel_id:{comment.peer_id.channel_id}', comment.date)
-                
+    async def get_comments_info(
+        self,
+        message: Message,
+        channel: Channel,
+        limit: int,
+        reverse: bool,
+        min_id: int = 0,
+        comment_repo: CommentRepository | None = None
+    ) -> tuple[int, int]:
+        """
+        Собирает комментарии к посту с id больше min_id, не больше limit (None — все).
+
+        :return: (количество прочитанных комментариев, наибольший прочитанный id).
+        """
+        comment_repo = comment_repo or self.comment_repo
+        fetched = fetched_max_id = 0
+        async with BatchWriter(
+                partial(comment_repo.create_comments, refresh=self.refresh),
+                size=self.config.COMMENTS_BATCH_SIZE,
+                interval=self.config.BATCH_FLUSH_INTERVAL) as batch:
+            async with self.guard("GetReplies"):
+                async for comment in self.client.iter_messages(
+                        entity=channel,
+                        reply_to=message.id,
+                        limit=limit,
+                        min_id=min_id,
+                        reverse=reverse):
+                    await batch.add(comment_to_row(comment, channel.id, message.id))
+                    fetched += 1
+                    fetched_max_id = max(fetched_max_id, comment.id)
+                    if self.progress:
+                        self.progress.add(comments=1)
+        return fetched, fetched_max_id
+
     async def subscribe(self, channel_username: str):
         await self.connect()
         try:
-            await self.client(JoinChannelRequest(channel_username))
+            async with self.guard("JoinChannel"):
+                await self.client(JoinChannelRequest(channel_username))
         finally:
             await self.disconnect()
 
-    async def run(self, channel_link: str, limit: int):
+    async def run(
+        self,
+        channel_link: str,
+        limit: int,
+        batch_size: int | None = None,
+        incremental: bool = False,
+        crawl_id: str | None = None,
+        min_id: int = 0,
+        offset_id: int = 0,
+        since: datetime | None = None
+    ) -> int:
         """
         Основной метод для запуска сборщика постов.
         
         :param channel_link: Ссылка на Telegram-канал.
+        :param batch_size: Размер пачки постов для пакетной записи.
+        :param incremental: Собирать только сообщения новее водяного знака канала.
+        :param crawl_id: Идентификатор обхода для возобновления с контрольной точки.
+        :param min_id: Нижняя граница окна id сообщений (не включается).
+        :param offset_id: Верхняя граница окна id сообщений (не включается).
+        :param since: Время самого старого сообщения обхода.
+        :return: Количество обработанных сообщений.
         """
         await self.connect()
         try:
-            await self.fetch_channel_posts(channel_link, limit)
+            return await self.fetch_channel_posts(
+                channel_link, limit, batch_size, incremental, crawl_id, min_id, offset_id, since
+            )
         finally:
             await self.disconnect()
@@ -2,7 +2,8 @@ import datetime
 import enum
 from typing import Optional
 
-from sqlalchemy import ForeignKey, BigInteger
+from sqlalchemy import ForeignKey, BigInteger, DateTime, Index, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -10,16 +11,34 @@ class Base(DeclarativeBase):
     pass
 
 
+METRICS = ("reactions", "replies")
+
+
 class Post(Base):
     __tablename__ = "Posts"
+    # id сообщения уникален только внутри канала; таблица секционирована по месяцам time
+    __table_args__ = (
+        Index("ix_Posts_time_channel_id_post_id", "time", "channel_id", "post_id"),
+        Index("ix_Posts_channel_id_time", "channel_id", "time"),
+        Index("ix_Posts_channel_name_time", "channel_name", "time"),
+        Index("ix_Posts_reactions", "reactions", postgresql_using="gin"),
+        Index("ix_Posts_channel_id_reactions_total", "channel_id", "reactions_total"),
+        {"postgresql_partition_by": "RANGE (time)"},
+    )
+    channel_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     post_id: Mapped[int] = mapped_column(primary_key=True)
-    channel_id: Mapped[int] = mapped_column(BigInteger)
     channel_name: Mapped[str] = mapped_column(nullable=True)
     url: Mapped[str] = mapped_column()
     text: Mapped[str] = mapped_column()
     media: Mapped[str] = mapped_column()
-    time: Mapped[datetime.datetime] = mapped_column()
-    reactions: Mapped[str] = mapped_column(nullable=True)
+    time: Mapped[datetime.datetime] = mapped_column(primary_key=True)
+    # {эмодзи: количество}
+    reactions: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+    reactions_total: Mapped[int] = mapped_column(default=0, server_default="0")
+    replies_count: Mapped[Optional[int]] = mapped_column(nullable=True)
+    replies_max_id: Mapped[Optional[int]] = mapped_column(nullable=True)
+    # Отпечаток text, media и reactions для обновления только изменившихся постов
+    content_hash: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
 
 
 class Account(Base):
@@ -28,10 +47,12 @@ class Account(Base):
     login: Mapped[str] = mapped_column(nullable=False, unique=True)
     status: Mapped[str] = mapped_column(default="active")
     requests: Mapped[int] = mapped_column(default=0)
+    lease_holder: Mapped[Optional[str]] = mapped_column(nullable=True)
+    lease_expires_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     proxy_id: Mapped[Optional[int]] = mapped_column(
         ForeignKey("Proxies.id", ondelete="SET NULL"), nullable=True
     )
-    proxy: Mapped[Optional["Proxy"]] = relationship()
+    proxy: Mapped[Optional["Proxy"]] = relationship(lazy="selectin")
 
     def __repr__(self):
         return f"<Account {self.login=} {self.status=}>"
@@ -70,10 +91,48 @@ class Proxy(Base):
     
 class Comment(Base):
     __tablename__ = "Comments"
+    # Внешнего ключа на Posts нет: ключ секционированной таблицы включает time
+    __table_args__ = (
+        Index("ix_Comments_channel_id_post_id_time_id", "channel_id", "post_id", "time", "id"),
+        {"postgresql_partition_by": "RANGE (time)"},
+    )
+    channel_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     id: Mapped[int] = mapped_column(primary_key=True)
-    post_id: Mapped[int] = mapped_column(ForeignKey("Posts.post_id"))
+    post_id: Mapped[int] = mapped_column()
     text: Mapped[str] = mapped_column()
     user_id: Mapped[str] = mapped_column()
-    time: Mapped[datetime.datetime] = mapped_column()
+    time: Mapped[datetime.datetime] = mapped_column(primary_key=True)
+    content_hash: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+
+
+class PostMetricsSnapshot(Base):
+    __tablename__ = "PostMetricsSnapshots"
+    # Снимок пишется только при изменении метрик; таблица секционирована по месяцам time
+    __table_args__ = (
+        {"postgresql_partition_by": "RANGE (time)"},
+    )
+    channel_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    post_id: Mapped[int] = mapped_column(primary_key=True)
+    time: Mapped[datetime.datetime] = mapped_column(primary_key=True)
+    # Значения в порядке METRICS: реакции и комментарии. Просмотры растут почти при каждом
+    # чтении поста и сделали бы снимок на каждый обход, поэтому в снимок не входят
+    metrics: Mapped[list[int]] = mapped_column(ARRAY(Integer))
+
+
+class ChannelSyncState(Base):
+    __tablename__ = "ChannelSyncStates"
+    channel_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    username: Mapped[Optional[str]] = mapped_column(nullable=True)
+    last_message_id: Mapped[int] = mapped_column(BigInteger, default=0)
+    last_synced_at: Mapped[Optional[datetime.datetime]] = mapped_column(nullable=True)
 
 
+class CrawlCheckpoint(Base):
+    __tablename__ = "CrawlCheckpoints"
+    crawl_id: Mapped[str] = mapped_column(primary_key=True)
+    channel_link: Mapped[str] = mapped_column()
+    offset_id: Mapped[int] = mapped_column(BigInteger, default=0)
+    processed: Mapped[int] = mapped_column(default=0)
+    total: Mapped[Optional[int]] = mapped_column(nullable=True)
+    status: Mapped[str] = mapped_column(default="running")
+    updated_at: Mapped[datetime.datetime] = mapped_column()
@@ -0,0 +1,49 @@
+import time
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, который считает время ожидания свободного соединения.
+
+    В ожидание входит и открытие нового соединения, если пул создаёт его сверх
+    уже открытых, поэтому метрика показывает полную задержку получения соединения.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        started = time.monotonic()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.monotonic() - started
+            self.waits += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def recreate(self) -> "TimedQueuePool":
+        pool = super().recreate()
+        pool.waits, pool.wait_total, pool.wait_max = self.waits, self.wait_total, self.wait_max
+        return pool
+
+    def stats(self) -> dict:
+        """
+        Возвращает текущее состояние пула и накопленные метрики ожидания.
+        """
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "waits": self.waits,
+            "wait_total": round(self.wait_total, 4),
+            "wait_avg": round(self.wait_total / self.waits, 4) if self.waits else 0.0,
+            "wait_max": round(self.wait_max, 4),
+        }
@@ -1,7 +1,31 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import logging
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 from src.core.config import Config
+from src.db.pool import TimedQueuePool
+
+logger = logging.getLogger(__name__)
+
+config = Config()
+
+# Config уже проверил, что пул помещается в долю процесса; здесь предупреждаем,
+# если сессии воркера будут ждать соединений из-за слишком маленькой доли
+if config.db_pool_size + config.db_max_overflow < config.TASKS_PER_PROCESS + config.COMMENTS_PROCESS_CONCURRENCY:
+    logger.warning(
+        f"Пул соединений ({config.db_pool_size} + {config.db_max_overflow}) меньше TASKS_PER_PROCESS + "
+        f"COMMENTS_PROCESS_CONCURRENCY ({config.TASKS_PER_PROCESS + config.COMMENTS_PROCESS_CONCURRENCY}): "
+        f"сессии будут ждать свободного соединения до DB_POOL_TIMEOUT"
+    )
 
-engine = create_engine(Config().DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_async_engine(
+    config.DATABASE_URL,
+    poolclass=TimedQueuePool,
+    # Постоянные соединения — сессии обходов, переполнение — сессии веток комментариев
+    pool_size=config.db_pool_size,
+    max_overflow=config.db_max_overflow,
+    pool_timeout=config.DB_POOL_TIMEOUT,
+    pool_recycle=config.DB_POOL_RECYCLE,
+    pool_pre_ping=config.DB_POOL_PRE_PING,
+)
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
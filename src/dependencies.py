@@ -1,54 +1,55 @@
 from fastapi import Depends
-from sqlalchemy.orm import Session
-from contextlib import contextmanager
+from sqlalchemy.ext.asyncio import AsyncSession
+from contextlib import asynccontextmanager
 
 from src.repositories.account import AccountRepository
 from src.repositories.proxy import ProxyRepository
 from src.repositories.post import PostRepository
 from src.repositories.comment import CommentRepository
+from src.repositories.post_metrics import PostMetricsRepository
 
 from src.db.session import SessionLocal
 
-@contextmanager
-def get_db():
-    db = SessionLocal()
-    try:
+@asynccontextmanager
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-def get_db_dep():
-    db = SessionLocal()
-    try:
+async def get_db_dep():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-def get_account_repository(db: Session = Depends(get_db_dep)) -> AccountRepository:
+def get_account_repository(db: AsyncSession = Depends(get_db_dep)) -> AccountRepository:
     """
     Зависимость для получения экземпляра AccountRepository.
     """
     return AccountRepository(db)
 
-def get_comment_repository(db: Session = Depends(get_db_dep)) -> CommentRepository:
+def get_comment_repository(db: AsyncSession = Depends(get_db_dep)) -> CommentRepository:
     """
     Зависимость для получения экземпляра CommentRepository.
     """
     return CommentRepository(db)
 
 
-def get_proxy_repository(db: Session = Depends(get_db_dep)) -> ProxyRepository:
+def get_proxy_repository(db: AsyncSession = Depends(get_db_dep)) -> ProxyRepository:
     """
     Зависимость для получения экземпляра ProxyRepository.
     """
     return ProxyRepository(db)
 
 
-def get_post_repository(db: Session = Depends(get_db_dep)) -> PostRepository:
+def get_post_repository(db: AsyncSession = Depends(get_db_dep)) -> PostRepository:
     """
     Зависимость для получения экземпляра PostRepository.
     """
     return PostRepository(db)
 
+
+def get_post_metrics_repository(db: AsyncSession = Depends(get_db_dep)) -> PostMetricsRepository:
+    """
+    Зависимость для получения экземпляра PostMetricsRepository.
+    """
+    return PostMetricsRepository(db)
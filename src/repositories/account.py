@@ -1,6 +1,7 @@
 import logging
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from datetime import timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func, or_
 from src.db.models import Account, Proxy
 from src.repositories.proxy import ProxyRepository
 
@@ -8,23 +9,98 @@ logger = logging.getLogger(__name__)
 
 
 class AccountRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_account(self) -> Account:
+    async def get_account(self) -> Account:
         """
         Возвращает активный аккаунт с наименьшим количеством запросов.
         """
-        return self.db.query(Account).filter(Account.status == 'active').order_by(Account.requests).first()
+        result = await self.db.scalars(
+            select(Account).where(Account.status == 'active').order_by(Account.requests).limit(1)
+        )
+        return result.first()
 
-    def get_account_by_phone_number(self, phone_number: str) -> Account | None:
+    async def lease_account(self, holder: str, ttl: int, exclude_ids: set[int] = frozenset()) -> Account | None:
+        """
+        Атомарно берёт в аренду активный аккаунт с наименьшим количеством запросов.
+
+        Строка блокируется через SELECT ... FOR UPDATE SKIP LOCKED, поэтому параллельные
+        воркеры получают разные аккаунты. Аренды с истёкшим сроком (упавшие воркеры)
+        считаются свободными. Аккаунты, уже арендованные тем же holder, выдаются в первую очередь.
+        """
+        stmt = (
+            select(Account)
+            .where(
+                Account.status == 'active',
+                Account.id.not_in(exclude_ids),
+                or_(
+                    Account.lease_expires_at.is_(None),
+                    Account.lease_expires_at < func.now(),
+                    Account.lease_holder == holder
+                )
+            )
+            .order_by(func.coalesce(Account.lease_holder == holder, False).desc(), Account.requests)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        account = (await self.db.execute(stmt)).scalar_one_or_none()
+
+        if account is None:
+            await self.db.rollback()
+            return None
+
+        account.lease_holder = holder
+        account.lease_expires_at = func.now() + timedelta(seconds=ttl)
+        account.requests = Account.requests + 1
+        await self.db.commit()
+        await self.db.refresh(account, ["lease_expires_at", "requests"])
+        return account
+
+    async def renew_leases(self, holder: str, ttl: int) -> int:
+        """
+        Продлевает все аренды holder на ttl секунд. Возвращает количество продлённых аренд.
+        """
+        result = await self.db.execute(
+            update(Account)
+            .where(Account.lease_holder == holder)
+            .values(lease_expires_at=func.now() + timedelta(seconds=ttl))
+        )
+        await self.db.commit()
+        return result.rowcount
+
+    async def release_leases(self, holder: str, account_ids: list[int] | None = None) -> None:
+        """
+        Освобождает аренды holder для заданных аккаунтов (для всех, если account_ids не передан).
+        """
+        stmt = update(Account).where(Account.lease_holder == holder)
+        if account_ids is not None:
+            if not account_ids:
+                return
+            stmt = stmt.where(Account.id.in_(account_ids))
+
+        await self.db.execute(stmt.values(lease_holder=None, lease_expires_at=None))
+        await self.db.commit()
+
+    async def set_cooldown(self, account_id: int, seconds: int) -> None:
+        """
+        Убирает аккаунт из выдачи на seconds секунд (после FloodWait).
+        """
+        await self.db.execute(
+            update(Account)
+            .where(Account.id == account_id)
+            .values(lease_holder='cooldown', lease_expires_at=func.now() + timedelta(seconds=seconds))
+        )
+        await self.db.commit()
+
+    async def get_account_by_phone_number(self, phone_number: str) -> Account | None:
         """
         Получает аккаунт по номеру телефона.
         """
-        result = self.db.execute(select(Account).where(Account.login == phone_number))
+        result = await self.db.execute(select(Account).where(Account.login == phone_number))
         return result.scalar_one_or_none()
 
-    def create_account_in_db(self, phone_number: str, proxy: Proxy | None, proxy_id: int | None) -> Account:
+    async def create_account_in_db(self, phone_number: str, proxy: Proxy | None, proxy_id: int | None) -> Account:
         """
         Создает аккаунт. Если proxy передан, пытается найти его в БД или создать новый.
         Если proxy не передан, ищет по proxy_id.
@@ -33,51 +109,54 @@ class AccountRepository:
         proxy_repo = ProxyRepository(self.db)
 
         if proxy is not None:
-            proxy_db = proxy_repo.get_proxy_from_db(proxy)
+            proxy_db = await proxy_repo.get_proxy_from_db(proxy)
             if proxy_db is None:
-                proxy_db = proxy_repo.create_proxy_in_db(proxy)
+                proxy_db = await proxy_repo.create_proxy_in_db(proxy)
         else:
-            proxy_db = proxy_repo.get_proxy_by_id(proxy_id)
+            proxy_db = await proxy_repo.get_proxy_by_id(proxy_id)
 
         account.proxy_id = proxy_db.id
         self.db.add(account)
-        self.db.commit()
-        self.db.refresh(account)
+        await self.db.commit()
+        await self.db.refresh(account)
         return account
 
-    def get_account_by_id(self, account_id: int) -> Account:
+    async def get_account_by_id(self, account_id: int) -> Account:
         """
         Возвращает аккаунт по его ID.
         """
-        return self.db.get(Account, account_id)
+        return await self.db.get(Account, account_id)
 
-    def delete_account_from_db(self, account: Account) -> None:
+    async def delete_account_from_db(self, account: Account) -> None:
         """
         Удаляет аккаунт из БД.
         """
-        self.db.delete(account)
-        self.db.commit()
+        await self.db.delete(account)
+        await self.db.commit()
 
-    def set_banned(self, account: Account) -> None:
+    async def set_banned(self, account: Account) -> None:
         """
         Помечает аккаунт как заблокированный.
         """
         account.status = 'banned'
-        self.db.commit()
+        await self.db.commit()
 
-    def get_accounts_by_status(self, active: bool) -> list[Account]:
+    async def get_accounts_by_status(self, active: bool) -> list[Account]:
         """
         Возвращает аккаунты по статусу.
         Если active==True, возвращает только активные.
         """
         if active:
-            return self.db.query(Account).filter(Account.status == 'active').all()
+            result = await self.db.scalars(select(Account).where(Account.status == 'active'))
         else:
-            return self.db.query(Account).all()
+            result = await self.db.scalars(select(Account))
+        return list(result.all())
 
-    def increment_account_requests(self, account: Account) -> None:
+    async def increment_account_requests(self, account: Account) -> None:
         """
         Увеличивает количество запросов аккаунта на 1.
         """
-        account.requests += 1
-        self.db.commit()
+        await self.db.execute(
+            update(Account).where(Account.id == account.id).values(requests=Account.requests + 1)
+        )
+        await self.db.commit()
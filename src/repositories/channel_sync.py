@@ -0,0 +1,64 @@
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+
+from src.db.models import ChannelSyncState
+
+logger = logging.getLogger(__name__)
+
+
+class ChannelSyncRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_last_message_id(self, channel_id: int) -> int:
+        """
+        Возвращает id последнего синхронизированного сообщения канала (0, если канал ещё не синхронизировался).
+        """
+        result = await self.db.execute(
+            select(ChannelSyncState.last_message_id).where(ChannelSyncState.channel_id == channel_id)
+        )
+        return result.scalar_one_or_none() or 0
+
+    async def get_usernames(self) -> list[str]:
+        """
+        Возвращает username всех синхронизированных каналов, у которых он известен.
+        """
+        result = await self.db.execute(
+            select(ChannelSyncState.username).where(ChannelSyncState.username.is_not(None))
+        )
+        return list(result.scalars())
+
+    async def advance(self, channel_id: int, username: str | None, last_message_id: int) -> bool:
+        """
+        Сдвигает водяной знак канала вперёд и фиксирует транзакцию.
+
+        Вызывается в той же транзакции, что и запись постов, поэтому посты
+        и водяной знак сохраняются атомарно. Водяной знак никогда не уменьшается.
+        """
+        stmt = insert(ChannelSyncState).values(
+            channel_id=channel_id,
+            username=username,
+            last_message_id=last_message_id,
+            last_synced_at=datetime.now(timezone.utc)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['channel_id'],
+            set_={
+                "username": stmt.excluded.username,
+                "last_message_id": func.greatest(ChannelSyncState.last_message_id, stmt.excluded.last_message_id),
+                "last_synced_at": stmt.excluded.last_synced_at,
+            }
+        )
+
+        try:
+            await self.db.execute(stmt)
+            await self.db.commit()
+            return True
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error("Ошибка при обновлении состояния синхронизации канала %s: %s", channel_id, e)
+            return False
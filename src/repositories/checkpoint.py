@@ -0,0 +1,52 @@
+import logging
+from datetime import datetime, timezone
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+
+from src.db.models import CrawlCheckpoint
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_checkpoint(self, crawl_id: str) -> CrawlCheckpoint | None:
+        """
+        Возвращает контрольную точку обхода по его ID.
+        """
+        return await self.db.get(CrawlCheckpoint, crawl_id)
+
+    async def save_checkpoint(
+        self,
+        crawl_id: str,
+        channel_link: str,
+        offset_id: int,
+        processed: int,
+        total: int | None,
+        status: str = "running"
+    ) -> None:
+        """
+        Создает или обновляет контрольную точку обхода.
+        """
+        values = dict(
+            channel_link=channel_link,
+            offset_id=offset_id,
+            processed=processed,
+            total=total,
+            status=status,
+            updated_at=datetime.now(timezone.utc)
+        )
+        stmt = insert(CrawlCheckpoint).values(crawl_id=crawl_id, **values).on_conflict_do_update(
+            index_elements=['crawl_id'],
+            set_=values
+        )
+
+        try:
+            await self.db.execute(stmt)
+            await self.db.commit()
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error("Ошибка при сохранении контрольной точки %s: %s", crawl_id, e)
@@ -1,21 +1,26 @@
 import logging
 from datetime import datetime
+from typing import AsyncIterator
+from sqlalchemy import Row, Select, select, tuple_
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert
 
 from src.db.models import Comment
+from src.repositories.partition import PartitionRepository
+from src.utils.utils import content_hash
 
 logger = logging.getLogger(__name__)
 
 
 class CommentRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create_comment(
+    async def create_comment(
         self,
         comment_id: int,
+        channel_id: int,
         message_id: int,
         text: str,
         user_id: int,
@@ -26,27 +31,174 @@ class CommentRepository:
         """
         stmt = insert(Comment).values(
             id=comment_id,
+            channel_id=channel_id,
             post_id=message_id,
             text=text,
             user_id=user_id,
-            time=date
+            time=date,
+            content_hash=content_hash(text)
         ).on_conflict_do_nothing()
 
         try:
-            self.db.execute(stmt)
-            self.db.commit()
+            await PartitionRepository(self.db).insert("Comments", [date], stmt)
+            await self.db.commit()
         except SQLAlchemyError as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error("Ошибка при создании комментария: %s", e)
 
-    def get_comments(self) -> list[Comment]:
+    async def create_comments(self, rows: list[dict], refresh: bool = False) -> None:
+        """
+        Создает комментарии одним executemany (см. PostRepository.create_posts).
+
+        Если пакет не записался целиком, строки вставляются по одной внутри
+        SAVEPOINT, чтобы ошибочная строка не откатывала весь пакет.
+
+        :param refresh: Обновлять текст уже сохранённых комментариев, если изменился content_hash.
+        """
+        if not rows:
+            return
+
+        if refresh:
+            rows = await self._changed_rows(rows)
+            if not rows:
+                return
+            stmt = insert(Comment)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['channel_id', 'id', 'time'],
+                set_={"text": stmt.excluded.text, "content_hash": stmt.excluded.content_hash},
+                where=Comment.content_hash.is_distinct_from(stmt.excluded.content_hash)
+            )
+        else:
+            stmt = insert(Comment).on_conflict_do_nothing()
+
+        try:
+            await PartitionRepository(self.db).insert("Comments", [row["time"] for row in rows], stmt, rows)
+            await self.db.commit()
+            return
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.warning("Ошибка пакетной вставки комментариев, запись по одному: %s", e)
+
+        for row in rows:
+            try:
+                async with self.db.begin_nested():
+                    await self.db.execute(stmt, row)
+            except SQLAlchemyError as e:
+                logger.error("Ошибка при создании комментария %s: %s", row.get("id"), e)
+        await self.db.commit()
+
+    async def _changed_rows(self, rows: list[dict]) -> list[dict]:
+        """
+        Оставляет новые комментарии и комментарии, у которых content_hash отличается от сохранённого.
+        """
+        times = [row["time"] for row in rows]
+        result = await self.db.execute(
+            select(Comment.channel_id, Comment.id, Comment.content_hash)
+            .where(
+                tuple_(Comment.channel_id, Comment.id).in_([(row["channel_id"], row["id"]) for row in rows]),
+                Comment.time.between(min(times), max(times))
+            )
+        )
+        stored = {(channel_id, comment_id): content_hash for channel_id, comment_id, content_hash in result}
+        return [
+            row for row in rows
+            if (row["channel_id"], row["id"]) not in stored
+            or stored[(row["channel_id"], row["id"])] != row["content_hash"]
+        ]
+
+    async def get_comments(self) -> list[Comment]:
         """
         Возвращает все комментарии.
         """
-        return self.db.query(Comment).all()
+        result = await self.db.scalars(select(Comment))
+        return list(result.all())
+
+    async def get_comments_by_post_id(self, channel_id: int, post_id: int) -> list[Comment]:
+        """
+        Возвращает комментарии для заданного поста канала.
+        """
+        result = await self.db.scalars(
+            select(Comment).where(Comment.channel_id == channel_id, Comment.post_id == post_id)
+        )
+        return list(result.all())
+
+    @staticmethod
+    def _comments_query(
+        channel_id: int,
+        post_id: int,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        after: tuple[datetime, int] | None = None
+    ) -> Select:
+        stmt = (
+            select(Comment)
+            .where(Comment.channel_id == channel_id, Comment.post_id == post_id)
+            .order_by(Comment.time, Comment.id)
+        )
+        if since is not None:
+            stmt = stmt.where(Comment.time >= since)
+        if until is not None:
+            stmt = stmt.where(Comment.time < until)
+        if after is not None:
+            stmt = stmt.where(tuple_(Comment.time, Comment.id) > after)
+        return stmt
+
+    async def page_comments(
+        self,
+        channel_id: int,
+        post_id: int,
+        limit: int,
+        after: tuple[datetime, int] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None
+    ) -> list[Comment]:
+        """
+        Возвращает страницу комментариев поста в хронологическом порядке.
+
+        :param after: Ключ (time, id) последнего комментария предыдущей страницы.
+        """
+        stmt = self._comments_query(channel_id, post_id, since, until, after).limit(limit)
+        result = await self.db.scalars(stmt)
+        return list(result.all())
 
-    def get_comments_by_post_id(self, post_id: int) -> list[Comment]:
+    async def stream_comments(
+        self,
+        channel_id: int,
+        post_id: int,
+        chunk_size: int,
+        after: tuple[datetime, int] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None
+    ) -> AsyncIterator[Comment]:
         """
-        Возвращает комментарии для заданного поста.
+        Отдаёт комментарии поста в хронологическом порядке через серверный курсор.
+        """
+        stmt = self._comments_query(channel_id, post_id, since, until, after)
+        result = await self.db.stream_scalars(stmt.execution_options(yield_per=chunk_size))
+        async for comment in result:
+            yield comment
+
+    async def stream_post_comments(
+        self,
+        channel_id: int,
+        post_ids: list[int],
+        chunk_size: int,
+        since: datetime | None = None
+    ) -> AsyncIterator[Row]:
+        """
+        Отдаёт строки (post_id, id, user_id, text, time) комментариев к нескольким постам канала
+        через серверный курсор, без создания ORM-объектов.
+
+        :param since: Время самого раннего из постов: комментарии не старше поста,
+            поэтому более ранние секции не просматриваются.
         """
-        return self.db.query(Comment).filter_by(post_id=post_id).all()
\ No newline at end of file
+        stmt = (
+            select(Comment.post_id, Comment.id, Comment.user_id, Comment.text, Comment.time)
+            .where(Comment.channel_id == channel_id, Comment.post_id.in_(post_ids))
+            .order_by(Comment.post_id, Comment.time, Comment.id)
+        )
+        if since is not None:
+            stmt = stmt.where(Comment.time >= since)
+        result = await self.db.stream(stmt.execution_options(yield_per=chunk_size))
+        async for row in result:
+            yield row
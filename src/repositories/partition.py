@@ -0,0 +1,204 @@
+import asyncio
+import gzip
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("Posts", "Comments", "PostMetricsSnapshots")
+EXPORT_CHUNK_BYTES = 1 << 20
+
+
+def month_start(time: datetime) -> datetime:
+    """
+    Возвращает начало месяца time без часового пояса (в UTC), как в границах секций.
+    """
+    if time.tzinfo is not None:
+        time = time.astimezone(timezone.utc).replace(tzinfo=None)
+    return time.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def shift_month(month: datetime, months: int) -> datetime:
+    """
+    Сдвигает начало месяца на months месяцев.
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def retention_cutoff(now: datetime | None = None) -> datetime | None:
+    """
+    Возвращает начало самого старого хранимого месяца: секции до него архивирует
+    celery_maintain_partitions. None, если RETENTION_MONTHS не задан.
+    """
+    months = Config().RETENTION_MONTHS
+    if not months:
+        return None
+    return shift_month(month_start(now or datetime.now(timezone.utc)), -months)
+
+
+class PartitionRepository:
+    # Месяцы, для которых секции уже есть; общий для всех сессий процесса
+    _known: set[tuple[str, datetime]] = set()
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    def _months(times: Iterable[datetime]) -> set[datetime]:
+        # Соседние месяцы захватываются, если time в пределах суток от границы:
+        # Postgres приводит время к часовому поясу сессии
+        return {
+            month_start(time + shift)
+            for time in times
+            for shift in (timedelta(days=-1), timedelta(days=1))
+        }
+
+    async def ensure_partitions(self, table: str, times: Iterable[datetime]) -> None:
+        """
+        Создаёт месячные секции table, в которые попадут строки с заданным time.
+
+        Секции создаются в точке сохранения на соединении самой сессии: второе соединение
+        из пула при исчерпанном пуле ждало бы само себя до DB_POOL_TIMEOUT. Блокировка
+        родительской таблицы берётся только при создании новой секции, то есть раз в месяц,
+        и держится до фиксации вставки. Если таблица месяца есть, но отключена для архивации,
+        ensure_month_partition бросает ошибку, а не пишет строки мимо секции.
+        """
+        cutoff = retention_cutoff()
+        missing = sorted(
+            month for month in self._months(times)
+            if (table, month) not in self._known and (cutoff is None or month >= cutoff)
+        )
+        if not missing:
+            return
+
+        async with self.db.begin_nested():
+            for month in missing:
+                await self.db.execute(
+                    text("SELECT ensure_month_partition(:table, :month)"),
+                    {"table": table, "month": month}
+                )
+        self._known.update((table, month) for month in missing)
+
+    async def insert(self, table: str, times: list[datetime], stmt, rows: list[dict] | None = None) -> None:
+        """
+        Выполняет вставку stmt в секционированную таблицу, создавая недостающие секции.
+
+        Строки месяцев старше retention_cutoff() не вставляются: их секции архивируются
+        и удаляются, и такие строки были бы потеряны при следующей архивации.
+
+        Если секцию удалил другой процесс (архивация), кэш _known этого процесса устарел
+        и Postgres отвечает "no partition of relation ... found for row". Тогда месяцы
+        вычеркиваются из кэша, секции создаются заново и вставка повторяется.
+        """
+        cutoff = retention_cutoff()
+        if cutoff is not None and any(month_start(time) < cutoff for time in times):
+            kept = [row for row in rows if month_start(row["time"]) >= cutoff] if rows is not None else []
+            logger.warning(
+                "Строки %s старше срока хранения (%s) не записаны: %s",
+                table, cutoff, len(rows) - len(kept) if rows is not None else 1
+            )
+            if not kept:
+                return
+            rows, times = kept, [row["time"] for row in kept]
+
+        await self.ensure_partitions(table, times)
+        try:
+            async with self.db.begin_nested():
+                await self.db.execute(stmt, rows)
+        except IntegrityError as e:
+            if "no partition of relation" not in str(e.orig):
+                raise
+            logger.warning("Секция %s отсутствует, кэш секций сброшен: %s", table, e.orig)
+            self._known.difference_update((table, month) for month in self._months(times))
+            await self.ensure_partitions(table, times)
+            await self.db.execute(stmt, rows)
+
+    @staticmethod
+    def _parse(table: str, names: Iterable[str]) -> list[tuple[str, datetime]]:
+        partitions = []
+        for name in names:
+            try:
+                partitions.append((name, datetime.strptime(name[len(table) + 1:], "%Y_%m")))
+            except ValueError:
+                logger.warning("Секция %s не соответствует шаблону %s_YYYY_MM", name, table)
+        return partitions
+
+    async def list_partitions(self, table: str) -> list[tuple[str, datetime]]:
+        """
+        Возвращает подключённые секции table как (имя, начало месяца).
+        """
+        result = await self.db.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :table ORDER BY child.relname"
+            ),
+            {"table": table}
+        )
+        return self._parse(table, result.scalars())
+
+    async def list_detached(self, table: str) -> list[tuple[str, datetime]]:
+        """
+        Возвращает отключённые, но ещё не удалённые секции table, например
+        оставшиеся после сбоя выгрузки в архив.
+        """
+        result = await self.db.execute(
+            text(
+                "SELECT relname FROM pg_class "
+                "WHERE relkind = 'r' AND NOT relispartition AND relname ~ :pattern ORDER BY relname"
+            ),
+            {"pattern": f"^{table}_[0-9]{{4}}_[0-9]{{2}}$"}
+        )
+        return self._parse(table, result.scalars())
+
+    async def detach_partition(self, table: str, name: str, month: datetime) -> None:
+        """
+        Отключает секцию от table. Секция остаётся обычной таблицей, и в неё больше
+        не попадают новые строки, поэтому выгрузка после отключения ничего не теряет.
+        """
+        await self.db.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+        await self.db.commit()
+        self._known.discard((table, month))
+
+    async def export_partition(self, name: str, path: str) -> None:
+        """
+        Выгружает таблицу в сжатый CSV через COPY без построчного чтения в ORM.
+
+        Сжатие и запись в файл выполняются в отдельном потоке блоками по EXPORT_CHUNK_BYTES,
+        чтобы не останавливать общий цикл событий. Существующий файл не перезаписывается.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = await self.db.connection()
+        raw = await conn.get_raw_connection()
+
+        file = await asyncio.to_thread(gzip.open, path, "xb")
+        try:
+            buffer = bytearray()
+            async with raw.driver_connection.cursor() as cursor:
+                async with cursor.copy(f'COPY "{name}" TO STDOUT (FORMAT csv, HEADER)') as copy:
+                    async for data in copy:
+                        buffer += data
+                        if len(buffer) >= EXPORT_CHUNK_BYTES:
+                            await asyncio.to_thread(file.write, bytes(buffer))
+                            buffer.clear()
+            await asyncio.to_thread(file.write, bytes(buffer))
+        finally:
+            await asyncio.to_thread(file.close)
+        await self.db.commit()
+
+    async def drop_table(self, name: str) -> None:
+        """
+        Удаляет отключённую секцию целиком, без построчного DELETE.
+        """
+        await self.db.execute(text(f'DROP TABLE "{name}"'))
+        await self.db.commit()
@@ -1,28 +1,34 @@
 import logging
 from datetime import datetime
+from sqlalchemy import Integer, Select, func, select, true, tuple_, update
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert
-from typing import List
+from typing import AsyncIterator, List
 
 from src.db.models import Post
+from src.repositories.partition import PartitionRepository
+from src.utils.utils import content_hash
 
 logger = logging.getLogger(__name__)
 
+# Колонки, которые обновляются при повторной записи изменившегося поста
+REFRESH_COLUMNS = ("text", "media", "reactions", "reactions_total", "content_hash")
+
 
 class PostRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create_post(
+    async def create_post(
         self,
         post_id: int,
         url: str,
         text: str,
         media: str,
         date: datetime,
-        channel_id: str,
-        reactions: str
+        channel_id: int,
+        reactions: dict[str, int]
     ) -> None:
         """
         Создает пост.
@@ -35,32 +41,286 @@ class PostRepository:
             time=date,
             channel_id=channel_id,
             reactions=reactions,
-            channel_name=url.split('/')[3]
+            reactions_total=sum(reactions.values()),
+            channel_name=url.split('/')[3],
+            content_hash=content_hash(text, media, reactions)
         ).on_conflict_do_nothing(
-            index_elements=['post_id']
+            index_elements=['channel_id', 'post_id', 'time']
         )
         
         try:
-            self.db.execute(stmt)
-            self.db.commit()
+            await PartitionRepository(self.db).insert("Posts", [date], stmt)
+            await self.db.commit()
         except SQLAlchemyError as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error("Ошибка при создании поста: %s", e)
 
-    def get_posts(self) -> list[Post]:
+    async def create_posts(self, rows: list[dict], commit: bool = True, refresh: bool = False) -> bool:
+        """
+        Создает посты одним executemany.
+
+        Текст запроса не зависит от количества строк, поэтому он берётся из кэша
+        скомпилированных запросов SQLAlchemy и подготавливается на сервере Postgres.
+
+        :param commit: Если False, транзакция остаётся открытой, чтобы вызывающий код
+            мог зафиксировать её вместе с другими изменениями.
+        :param refresh: Обновлять уже сохранённые посты, если изменился их content_hash.
+            Неизменившиеся посты отбрасываются до вставки и не порождают записей и WAL.
+        :return: True, если вставка выполнена без ошибок.
+        """
+        if not rows:
+            return True
+
+        try:
+            if refresh:
+                rows = await self._changed_rows(rows)
+                stmt = insert(Post)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['channel_id', 'post_id', 'time'],
+                    set_={name: stmt.excluded[name] for name in REFRESH_COLUMNS},
+                    where=Post.content_hash.is_distinct_from(stmt.excluded.content_hash)
+                )
+            else:
+                stmt = insert(Post).on_conflict_do_nothing(
+                    index_elements=['channel_id', 'post_id', 'time']
+                )
+
+            if rows:
+                await PartitionRepository(self.db).insert("Posts", [row["time"] for row in rows], stmt, rows)
+            if commit:
+                await self.db.commit()
+            return True
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error("Ошибка при пакетном создании постов: %s", e)
+            return False
+
+    async def _changed_rows(self, rows: list[dict]) -> list[dict]:
+        """
+        Оставляет новые посты и посты, у которых content_hash отличается от сохранённого.
+        Диапазон time пачки ограничивает поиск секциями её месяцев.
+        """
+        times = [row["time"] for row in rows]
+        result = await self.db.execute(
+            select(Post.channel_id, Post.post_id, Post.content_hash)
+            .where(
+                tuple_(Post.channel_id, Post.post_id).in_([(row["channel_id"], row["post_id"]) for row in rows]),
+                Post.time.between(min(times), max(times))
+            )
+        )
+        stored = {(channel_id, post_id): content_hash for channel_id, post_id, content_hash in result}
+        return [
+            row for row in rows
+            if (row["channel_id"], row["post_id"]) not in stored
+            or stored[(row["channel_id"], row["post_id"])] != row["content_hash"]
+        ]
+
+    async def get_replies_state(
+        self,
+        channel_id: int,
+        post_ids: list[int],
+        times: list[datetime]
+    ) -> dict[int, tuple[int | None, int | None]]:
+        """
+        Возвращает сохранённые (replies_count, replies_max_id) для заданных постов канала.
+
+        :param times: Время постов; по их диапазону Postgres отбрасывает лишние секции.
+        """
+        if not post_ids:
+            return {}
+
+        result = await self.db.execute(
+            select(Post.post_id, Post.replies_count, Post.replies_max_id)
+            .where(
+                Post.channel_id == channel_id,
+                Post.post_id.in_(post_ids),
+                Post.time.between(min(times), max(times))
+            )
+        )
+        return {post_id: (replies_count, replies_max_id) for post_id, replies_count, replies_max_id in result}
+
+    async def set_replies_state(
+        self,
+        channel_id: int,
+        post_id: int,
+        time: datetime,
+        replies_count: int,
+        replies_max_id: int | None
+    ) -> None:
+        """
+        Сохраняет количество и max_id комментариев, с которыми пост был синхронизирован.
+
+        :param time: Время поста, по которому обновление попадает сразу в нужную секцию.
+        """
+        stmt = update(Post).where(Post.channel_id == channel_id, Post.post_id == post_id, Post.time == time).values(
+            replies_count=replies_count,
+            replies_max_id=replies_max_id
+        )
+
+        try:
+            await self.db.execute(stmt)
+            await self.db.commit()
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error("Ошибка при обновлении комментариев поста %s: %s", post_id, e)
+
+    async def get_post(self, channel_id: int, post_id: int, since: datetime | None = None) -> Post | None:
+        """
+        Возвращает пост канала или None.
+
+        :param since: Нижняя граница времени поста; без неё просматриваются все секции.
+        """
+        stmt = select(Post).where(Post.channel_id == channel_id, Post.post_id == post_id).limit(1)
+        if since is not None:
+            stmt = stmt.where(Post.time >= since)
+        result = await self.db.scalars(stmt)
+        return result.first()
+
+    async def get_posts(self) -> list[Post]:
         """
         Возвращает все посты.
         """
-        return self.db.query(Post).all()
+        result = await self.db.scalars(select(Post))
+        return list(result.all())
 
-    def get_posts_by_channel_id(self, channel_id: str) -> List[Post]:
+    async def get_posts_by_channel_id(self, channel_id: int) -> List[Post]:
         """
         Возвращает все посты для заданного channel_id.
         """
-        return self.db.query(Post).filter(Post.channel_id == channel_id).all()
+        result = await self.db.scalars(select(Post).where(Post.channel_id == channel_id))
+        return list(result.all())
     
-    def get_posts_by_channel_name(self, channel_name: str) -> List[Post]:
+    async def get_posts_by_channel_name(self, channel_name: str) -> List[Post]:
         """
         Возвращает все посты для заданного channel_name.
         """
-        return self.db.query(Post).filter(Post.channel_name == channel_name).all()
\ No newline at end of file
+        result = await self.db.scalars(select(Post).where(Post.channel_name == channel_name))
+        return list(result.all())
+
+    @staticmethod
+    def _posts_query(
+        channel_name: str | None = None,
+        channel_id: int | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        after: tuple[datetime, int, int] | None = None
+    ) -> Select:
+        stmt = select(Post).order_by(Post.time.desc(), Post.channel_id.desc(), Post.post_id.desc())
+        if channel_name is not None:
+            stmt = stmt.where(Post.channel_name == channel_name)
+        if channel_id is not None:
+            stmt = stmt.where(Post.channel_id == channel_id)
+        if since is not None:
+            stmt = stmt.where(Post.time >= since)
+        if until is not None:
+            stmt = stmt.where(Post.time < until)
+        if after is not None:
+            stmt = stmt.where(tuple_(Post.time, Post.channel_id, Post.post_id) < after)
+        return stmt
+
+    async def page_posts(
+        self,
+        limit: int,
+        after: tuple[datetime, int, int] | None = None,
+        channel_name: str | None = None,
+        channel_id: int | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None
+    ) -> list[Post]:
+        """
+        Возвращает страницу постов от новых к старым.
+
+        :param after: Ключ (time, channel_id, post_id) последнего поста предыдущей страницы.
+        :param since: Нижняя граница времени поста (включается).
+        :param until: Верхняя граница времени поста (не включается).
+        """
+        stmt = self._posts_query(channel_name, channel_id, since, until, after).limit(limit)
+        result = await self.db.scalars(stmt)
+        return list(result.all())
+
+    async def stream_posts(
+        self,
+        chunk_size: int,
+        after: tuple[datetime, int, int] | None = None,
+        channel_name: str | None = None,
+        channel_id: int | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None
+    ) -> AsyncIterator[Post]:
+        """
+        Отдаёт посты от новых к старым через серверный курсор, читая по chunk_size строк.
+        """
+        stmt = self._posts_query(channel_name, channel_id, since, until, after)
+        result = await self.db.stream_scalars(stmt.execution_options(yield_per=chunk_size))
+        async for post in result:
+            yield post
+
+    async def top_posts_by_reaction(
+        self,
+        limit: int,
+        reaction: str | None = None,
+        channel_name: str | None = None,
+        channel_id: int | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None
+    ) -> list[Post]:
+        """
+        Возвращает посты с наибольшим количеством реакции reaction.
+
+        Посты без этой реакции отбираются оператором ? по GIN-индексу ix_Posts_reactions.
+
+        :param reaction: Эмодзи; если не задан, посты сортируются по reactions_total.
+        """
+        if reaction is None:
+            count = Post.reactions_total
+            stmt = select(Post)
+        else:
+            count = Post.reactions[reaction].astext.cast(Integer)
+            stmt = select(Post).where(Post.reactions.has_key(reaction))
+
+        stmt = stmt.order_by(count.desc(), Post.time.desc()).limit(limit)
+        if channel_name is not None:
+            stmt = stmt.where(Post.channel_name == channel_name)
+        if channel_id is not None:
+            stmt = stmt.where(Post.channel_id == channel_id)
+        if since is not None:
+            stmt = stmt.where(Post.time >= since)
+        if until is not None:
+            stmt = stmt.where(Post.time < until)
+
+        result = await self.db.scalars(stmt)
+        return list(result.all())
+
+    async def reaction_sums(
+        self,
+        channel_name: str | None = None,
+        channel_id: int | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None
+    ) -> dict[int, dict[str, int]]:
+        """
+        Возвращает суммы реакций по каналам: {channel_id: {эмодзи: количество}}.
+        Карты реакций разворачиваются и суммируются в Postgres через jsonb_each_text.
+        """
+        reaction = func.jsonb_each_text(Post.reactions).table_valued("key", "value").alias("reaction")
+        total = func.sum(reaction.c.value.cast(Integer))
+        stmt = (
+            select(Post.channel_id, reaction.c.key, total)
+            .select_from(Post)
+            .join(reaction, true())
+            .group_by(Post.channel_id, reaction.c.key)
+            .order_by(Post.channel_id, total.desc())
+        )
+        if channel_name is not None:
+            stmt = stmt.where(Post.channel_name == channel_name)
+        if channel_id is not None:
+            stmt = stmt.where(Post.channel_id == channel_id)
+        if since is not None:
+            stmt = stmt.where(Post.time >= since)
+        if until is not None:
+            stmt = stmt.where(Post.time < until)
+
+        sums: dict[int, dict[str, int]] = {}
+        for row_channel_id, key, count in await self.db.execute(stmt):
+            sums.setdefault(row_channel_id, {})[key] = count
+        return sums
@@ -0,0 +1,93 @@
+import logging
+from datetime import datetime
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+
+from src.db.models import PostMetricsSnapshot
+from src.repositories.partition import PartitionRepository
+
+logger = logging.getLogger(__name__)
+
+
+class PostMetricsRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def record(self, rows: list[dict], time: datetime, since: datetime) -> int:
+        """
+        Добавляет снимки метрик постов, у которых метрики изменились с последнего снимка.
+
+        Повторная синхронизация без изменений ничего не записывает, поэтому объём
+        таблицы растёт с количеством изменений, а не с количеством обходов.
+
+        :param rows: Словари с channel_id, post_id и metrics (значения в порядке METRICS).
+        :param time: Время снимка.
+        :param since: Время самого раннего из постов: снимков раньше публикации нет,
+            поэтому более ранние секции не просматриваются.
+        :return: Количество записанных снимков.
+        """
+        if not rows:
+            return 0
+
+        result = await self.db.execute(
+            select(PostMetricsSnapshot.channel_id, PostMetricsSnapshot.post_id, PostMetricsSnapshot.metrics)
+            .where(
+                tuple_(PostMetricsSnapshot.channel_id, PostMetricsSnapshot.post_id).in_(
+                    [(row["channel_id"], row["post_id"]) for row in rows]
+                ),
+                PostMetricsSnapshot.time >= since
+            )
+            .distinct(PostMetricsSnapshot.channel_id, PostMetricsSnapshot.post_id)
+            .order_by(PostMetricsSnapshot.channel_id, PostMetricsSnapshot.post_id, PostMetricsSnapshot.time.desc())
+        )
+        latest = {(channel_id, post_id): metrics for channel_id, post_id, metrics in result}
+        changed = [
+            {**row, "time": time} for row in rows
+            if latest.get((row["channel_id"], row["post_id"])) != row["metrics"]
+        ]
+        if not changed:
+            return 0
+
+        try:
+            await PartitionRepository(self.db).insert(
+                "PostMetricsSnapshots", [time], insert(PostMetricsSnapshot).on_conflict_do_nothing(), changed
+            )
+            await self.db.commit()
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error("Ошибка при записи метрик постов: %s", e)
+            return 0
+        return len(changed)
+
+    async def get_points(
+        self,
+        channel_id: int,
+        start: datetime,
+        end: datetime,
+        post_id: int | None = None
+    ) -> list[tuple[int, datetime, list[int]]]:
+        """
+        Возвращает снимки (post_id, time, metrics) за [start, end] и последний снимок
+        каждого поста до start, от которого отсчитываются значения в начале периода.
+
+        :param post_id: Пост канала; если не задан, возвращаются снимки всех постов канала.
+        """
+        columns = (PostMetricsSnapshot.post_id, PostMetricsSnapshot.time, PostMetricsSnapshot.metrics)
+        filters = [PostMetricsSnapshot.channel_id == channel_id]
+        if post_id is not None:
+            filters.append(PostMetricsSnapshot.post_id == post_id)
+
+        before = await self.db.execute(
+            select(*columns)
+            .where(*filters, PostMetricsSnapshot.time < start)
+            .distinct(PostMetricsSnapshot.post_id)
+            .order_by(PostMetricsSnapshot.post_id, PostMetricsSnapshot.time.desc())
+        )
+        within = await self.db.execute(
+            select(*columns)
+            .where(*filters, PostMetricsSnapshot.time >= start, PostMetricsSnapshot.time <= end)
+            .order_by(PostMetricsSnapshot.time)
+        )
+        return [tuple(row) for row in before] + [tuple(row) for row in within]
@@ -1,21 +1,22 @@
 from typing import Sequence
 from sqlalchemy import and_, delete, select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.models import Proxy
 
 
 class ProxyRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_proxy_by_id(self, proxy_id: int) -> Proxy | None:
+    async def get_proxy_by_id(self, proxy_id: int) -> Proxy | None:
         """
         Возвращает proxy по ID.
         """
-        return self.db.query(Proxy).filter_by(id=proxy_id).first()
+        result = await self.db.scalars(select(Proxy).where(Proxy.id == proxy_id))
+        return result.first()
 
-    def get_proxy_from_db(self, proxy: Proxy) -> Proxy | None:
+    async def get_proxy_from_db(self, proxy: Proxy) -> Proxy | None:
         """
         Находит proxy по его реквизитам.
         """
@@ -27,29 +28,30 @@ class ProxyRepository:
                 Proxy.port == proxy.port,
             )
         )
-        result = self.db.execute(stmt)
+        result = await self.db.execute(stmt)
         return result.scalar_one_or_none()
 
-    def create_proxy_in_db(self, proxy: Proxy) -> Proxy:
+    async def create_proxy_in_db(self, proxy: Proxy) -> Proxy:
         """
         Создает proxy в БД.
         """
         # Предполагается, что proxy имеет метод dict(), возвращающий словарь полей.
         new_proxy = Proxy(**proxy.dict())
         self.db.add(new_proxy)
-        self.db.commit()
-        self.db.refresh(new_proxy)
+        await self.db.commit()
+        await self.db.refresh(new_proxy)
         return new_proxy
 
-    def delete_proxy_by_id(self, proxy_id: int) -> None:
+    async def delete_proxy_by_id(self, proxy_id: int) -> None:
         """
         Удаляет proxy по ID.
         """
-        self.db.execute(delete(Proxy).where(Proxy.id == proxy_id))
-        self.db.commit()
+        await self.db.execute(delete(Proxy).where(Proxy.id == proxy_id))
+        await self.db.commit()
 
-    def get_all_proxies_from_db(self) -> Sequence[Proxy]:
+    async def get_all_proxies_from_db(self) -> Sequence[Proxy]:
         """
         Возвращает все proxy из БД.
         """
-        return self.db.query(Proxy).all()
+        result = await self.db.scalars(select(Proxy))
+        return result.all()
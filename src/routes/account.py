@@ -36,7 +36,7 @@ async def create_account(
     phone_number = session_file.filename.replace(".session", "")
 
     # Получение аккаунта по номеру телефона
-    account = account_repo.get_account_by_phone_number(phone_number=phone_number)
+    account = await account_repo.get_account_by_phone_number(phone_number=phone_number)
     logging.info(f"Account lookup result: {account}")
 
     if account is not None:
@@ -46,7 +46,7 @@ async def create_account(
 
     logging.info("Creating account with provided proxy_id")
     try:
-        account = account_repo.create_account_in_db(
+        account = await account_repo.create_account_in_db(
             phone_number=phone_number,
             proxy=None,
             proxy_id=proxy_id
@@ -85,7 +85,7 @@ async def create_account_with_proxy(
     phone_number = session_file.filename.replace(".session", "")
 
     logging.info("Looking up account by phone number")
-    account = account_repo.get_account_by_phone_number(phone_number=phone_number)
+    account = await account_repo.get_account_by_phone_number(phone_number=phone_number)
     logging.info(f"Account lookup result: {account}")
 
     if account is not None:
@@ -94,7 +94,7 @@ async def create_account_with_proxy(
         )
 
     logging.info("Creating account with proxy data")
-    account = account_repo.create_account_in_db(
+    account = await account_repo.create_account_in_db(
         phone_number=phone_number,
         proxy=proxy,
         proxy_id=None
@@ -111,7 +111,7 @@ async def get_accounts(
     active: bool = Query(False),
     account_repo: AccountRepository = Depends(get_account_repository)
 ):
-    return account_repo.get_accounts_by_status(active=active)
+    return await account_repo.get_accounts_by_status(active=active)
 
 
 @router.delete("/{account_id}", status_code=status.HTTP_200_OK)
@@ -120,7 +120,7 @@ async def delete_account(
     account_repo: AccountRepository = Depends(get_account_repository)
 ):
     logging.info("Getting account by id")
-    account = account_repo.get_account_by_id(account_id=account_id)
+    account = await account_repo.get_account_by_id(account_id=account_id)
     logging.info(f"Found account: {account}")
     if account is None:
         raise HTTPException(
@@ -138,5 +138,5 @@ async def delete_account(
         )
 
     logging.info("Deleting account from DB")
-    account_repo.delete_account_from_db(account=account)
+    await account_repo.delete_account_from_db(account=account)
     logging.info("Account successfully deleted from DB")
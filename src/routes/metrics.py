@@ -0,0 +1,17 @@
+import asyncio
+
+from fastapi import APIRouter
+
+from src.core.pool_stats import pool_stats
+from src.db.session import engine
+
+router = APIRouter()
+
+
+@router.get("/db")
+async def get_db_metrics():
+    """
+    Метрики пулов соединений с Postgres: процесса API и каждого процесса воркеров Celery
+    (по имени host:pid, обновляются раз в DB_POOL_STATS_INTERVAL секунд).
+    """
+    return {"api": engine.pool.stats(), "workers": await asyncio.to_thread(pool_stats.collect)}
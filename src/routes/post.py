@@ -0,0 +1,211 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from src.core.config import Config
+from src.db.models import METRICS
+from src.dependencies import get_db, get_post_repository, get_comment_repository, get_post_metrics_repository
+from src.repositories.post import PostRepository
+from src.repositories.comment import CommentRepository
+from src.repositories.partition import month_start, shift_month
+from src.repositories.post_metrics import PostMetricsRepository
+from src.schemas.post import (
+    PostModel, CommentModel, PostsPageModel, CommentsPageModel, ChannelReactionsModel,
+    MetricsPointModel, MetricsSeriesModel
+)
+from src.utils.utils import encode_cursor, decode_cursor, as_utc_naive, resample_metrics
+
+router = APIRouter()
+
+
+def parse_cursor(cursor: Optional[str], size: int) -> tuple | None:
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor, size)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+async def metrics_series(
+    metrics_repo: PostMetricsRepository,
+    channel_id: int,
+    post_id: Optional[int],
+    start: datetime,
+    end: datetime,
+    step: int
+) -> MetricsSeriesModel:
+    start, end = as_utc_naive(start), as_utc_naive(end)
+    if end < start or (end - start).total_seconds() / step >= Config().METRICS_MAX_POINTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Ряд должен содержать от 1 до {Config().METRICS_MAX_POINTS} точек"
+        )
+
+    points = await metrics_repo.get_points(channel_id, start, end, post_id)
+    series = resample_metrics(points, start, end, timedelta(seconds=step))
+    return MetricsSeriesModel(
+        channel_id=channel_id,
+        post_id=post_id,
+        step=step,
+        points=[
+            MetricsPointModel(time=time, **dict(zip(METRICS, values or [0] * len(METRICS))))
+            for time, values in series
+        ]
+    )
+
+
+@router.get("/", response_model=PostsPageModel)
+async def get_posts(
+    channel: Optional[str] = None,
+    channel_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    post_repo: PostRepository = Depends(get_post_repository)
+):
+    """
+    Возвращает посты от новых к старым с пагинацией по ключу (time, channel_id, post_id).
+
+    - **channel**: username канала.
+    - **since** / **until**: диапазон времени поста [since, until).
+    - **cursor**: next_cursor из предыдущего ответа.
+    - **stream**: отдать все подходящие посты начиная с cursor в формате NDJSON без пагинации.
+    """
+    after = parse_cursor(cursor, 3)
+
+    if stream:
+        async def rows():
+            # Сессия из Depends закрывается до отправки ответа, поэтому у потока своя сессия
+            async with get_db() as session:
+                async for post in PostRepository(session).stream_posts(
+                    Config().STREAM_CHUNK_SIZE, after, channel, channel_id, since, until
+                ):
+                    yield PostModel.model_validate(post).model_dump_json() + "\n"
+
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+    posts = await post_repo.page_posts(limit, after, channel, channel_id, since, until)
+    next_cursor = (
+        encode_cursor(posts[-1].time, posts[-1].channel_id, posts[-1].post_id) if len(posts) == limit else None
+    )
+    return PostsPageModel(posts=posts, next_cursor=next_cursor)
+
+
+@router.get("/top", response_model=list[PostModel])
+async def get_top_posts(
+    reaction: Optional[str] = None,
+    channel: Optional[str] = None,
+    channel_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    post_repo: PostRepository = Depends(get_post_repository)
+):
+    """
+    Возвращает посты с наибольшим количеством реакции.
+
+    - **reaction**: эмодзи; без него посты сортируются по общему количеству реакций.
+    """
+    return await post_repo.top_posts_by_reaction(limit, reaction, channel, channel_id, since, until)
+
+
+@router.get("/reactions", response_model=list[ChannelReactionsModel])
+async def get_reaction_sums(
+    channel: Optional[str] = None,
+    channel_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    post_repo: PostRepository = Depends(get_post_repository)
+):
+    """
+    Возвращает суммы реакций по каналам за период.
+    """
+    sums = await post_repo.reaction_sums(channel, channel_id, since, until)
+    return [
+        ChannelReactionsModel(channel_id=key, reactions=reactions, total=sum(reactions.values()))
+        for key, reactions in sums.items()
+    ]
+
+
+@router.get("/metrics", response_model=MetricsSeriesModel)
+async def get_channel_metrics(
+    channel_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    step: int = Query(Config().METRICS_STEP, ge=60),
+    metrics_repo: PostMetricsRepository = Depends(get_post_metrics_repository)
+):
+    """
+    Возвращает суммарные реакции и комментарии постов канала
+    с шагом step секунд.
+
+    - **start** / **end**: период ряда (по умолчанию последние METRICS_WINDOW секунд).
+    """
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(seconds=Config().METRICS_WINDOW)
+    return await metrics_series(metrics_repo, channel_id, None, start, end, step)
+
+
+@router.get("/{channel_id}/{post_id}/metrics", response_model=MetricsSeriesModel)
+async def get_post_metrics(
+    channel_id: int,
+    post_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    step: int = Query(Config().METRICS_STEP, ge=60),
+    post_repo: PostRepository = Depends(get_post_repository),
+    metrics_repo: PostMetricsRepository = Depends(get_post_metrics_repository)
+):
+    """
+    Возвращает ряд реакций и комментариев поста с шагом step секунд.
+
+    - **start** / **end**: период ряда (по умолчанию METRICS_WINDOW секунд от публикации поста).
+    """
+    if start is None:
+        # Ряды обычно запрашивают для недавних постов: сначала ищем в секциях текущего
+        # и прошлого месяца и только затем во всех
+        recent = shift_month(month_start(datetime.now(timezone.utc)), -1)
+        post = await post_repo.get_post(channel_id, post_id, recent) or await post_repo.get_post(channel_id, post_id)
+        if post is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Пост не найден")
+        start = post.time
+    end = end or start + timedelta(seconds=Config().METRICS_WINDOW)
+    return await metrics_series(metrics_repo, channel_id, post_id, start, end, step)
+
+
+@router.get("/{channel_id}/{post_id}/comments", response_model=CommentsPageModel)
+async def get_post_comments(
+    channel_id: int,
+    post_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    comment_repo: CommentRepository = Depends(get_comment_repository)
+):
+    """
+    Возвращает комментарии поста в хронологическом порядке с пагинацией по ключу (time, id).
+
+    - **stream**: отдать все подходящие комментарии начиная с cursor в формате NDJSON без пагинации.
+    """
+    after = parse_cursor(cursor, 2)
+
+    if stream:
+        async def rows():
+            async with get_db() as session:
+                async for comment in CommentRepository(session).stream_comments(
+                    channel_id, post_id, Config().STREAM_CHUNK_SIZE, after, since, until
+                ):
+                    yield CommentModel.model_validate(comment).model_dump_json() + "\n"
+
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+    comments = await comment_repo.page_comments(channel_id, post_id, limit, after, since, until)
+    next_cursor = encode_cursor(comments[-1].time, comments[-1].id) if len(comments) == limit else None
+    return CommentsPageModel(comments=comments, next_cursor=next_cursor)
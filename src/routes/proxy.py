@@ -14,7 +14,7 @@ async def get_all_proxies(
     proxy_repo: ProxyRepository = Depends(get_proxy_repository)
 ):
     try:
-        return proxy_repo.get_all_proxies_from_db()
+        return await proxy_repo.get_all_proxies_from_db()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -33,7 +33,7 @@ async def create_proxy(
         raise HTTPException(status_code=proxy_status, detail=error)
     
     try:
-        proxy_db = proxy_repo.create_proxy_in_db(proxy)
+        proxy_db = await proxy_repo.create_proxy_in_db(proxy)
         return PostProxyResModel(proxy_id=proxy_db.id)
     
     except IntegrityError:
@@ -53,13 +53,13 @@ async def delete_proxy(
     proxy_id: int,
     proxy_repo: ProxyRepository = Depends(get_proxy_repository)
 ):
-    if proxy_repo.get_proxy_by_id(proxy_id=proxy_id) is None:
+    if await proxy_repo.get_proxy_by_id(proxy_id=proxy_id) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='Proxy not found'
         )
     try:
-        proxy_repo.delete_proxy_by_id(proxy_id=proxy_id)
+        await proxy_repo.delete_proxy_by_id(proxy_id=proxy_id)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,13 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Optional
 
-from src.core.celery_tasks import celery, redis, celery_get_posts
-from src.schemas.task import TaskGetReqModel, AllTasksGetReqModel, CollectResModel
+from celery import uuid
+from celery.states import READY_STATES
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from src.core.celery_tasks import (
+    celery, redis, celery_get_posts, celery_crawl_sharded, celery_plan_crawl, celery_collect, celery_export,
+    celery_rescan
+)
+from src.schemas.task import TaskGetReqModel, AllTasksGetReqModel, CollectReqModel, CollectResModel
 from src.dependencies import get_account_repository, get_post_repository, get_comment_repository
 
 from src.repositories.post import PostRepository
 from src.repositories.account import AccountRepository
 from src.repositories.comment import CommentRepository
 
+from src.core.client_pool import client_pool
+from src.core.config import Config
+from src.core.export import ExportFormat
+from src.core.leases import account_leaser
+from src.core.progress import progress_redis, subscribe
+from src.core.task_registry import task_registry
 from src.core.worker import Worker
 
 router = APIRouter()
@@ -17,35 +34,211 @@ async def get_task_by_id(task_id: str):
     task = celery.AsyncResult(task_id)
     task_status = task.status
     task_result = redis.get(task_id)
+    progress = task.info.get("percent") if isinstance(task.info, dict) else None
     return TaskGetReqModel(
-        task_id=task_id, task_status=task_status, task_result=task_result
+        task_id=task_id, task_status=task_status, task_result=task_result, progress=progress
+    )
+
+
+@router.get("/{task_id}/events")
+async def stream_task_events(task_id: str):
+    """
+    Транслирует события хода задачи (Server-Sent Events) до её завершения.
+
+    Каждое событие содержит счётчики постов, комментариев и байт медиа, текущий offset_id,
+    скорость в постах в секунду, а также паузы из-за FloodWait.
+    """
+    async def events():
+        def task_state() -> str | None:
+            state = celery.AsyncResult(task_id).state
+            return state if state in READY_STATES else None
+
+        async for event in subscribe(progress_redis, task_id, Config().PROGRESS_KEEPALIVE, task_state):
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
 @router.get("/")
-async def get_tasks():
-    keys = redis.keys("celery-task-meta-*")
+async def get_tasks(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    channel: Optional[str] = None,
+):
+    """
+    Возвращает задачи от новых к старым постранично.
 
-    task_ids = [key.decode("utf-8").split("-", 3)[-1] for key in keys]
+    - **cursor**: next_cursor из предыдущего ответа.
+    - **status**: фильтр по статусу Celery (PENDING, STARTED, PROGRESS, RETRY, SUCCESS, FAILURE, REVOKED).
+    - **channel**: фильтр по ссылке на канал.
+    """
+    try:
+        page, next_cursor = task_registry.page(limit, cursor, status, channel)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    results = redis.mget([task["task_id"] for task in page]) if page else []
 
-    tasks = []
-    for task_id in task_ids:
-        task = await get_task_by_id(task_id)
-        tasks.append(task)
+    tasks = [
+        TaskGetReqModel(
+            task_id=task["task_id"],
+            task_status=task["status"],
+            task_result=result,
+            progress=float(task["progress"]) if task["progress"] else None,
+            name=task["name"],
+            channel=task["channel"] or None,
+            submitted_at=float(task["submitted_at"]),
+        )
+        for task, result in zip(page, results)
+    ]
 
-    return AllTasksGetReqModel(tasks=tasks)
+    return AllTasksGetReqModel(tasks=tasks, next_cursor=next_cursor)
 
 
 @router.post("/", response_model=CollectResModel)
 async def create_task(
     channel_link: str,
     limit: int,
+    batch_size: Optional[int] = None,
+    incremental: bool = False,
+    crawl_id: Optional[str] = None,
 ):
 
-    celery_task = celery_get_posts.delay({
+    # Задача регистрируется до отправки, чтобы воркер не обновил статус раньше регистрации
+    task_id = uuid()
+    task_registry.register(task_id, celery_get_posts.name, channel_link)
+    celery_task = celery_get_posts.apply_async(args=[{
         "channel_link": channel_link,
         "limit": limit,
-    })
+        "batch_size": batch_size,
+        "incremental": incremental,
+        "crawl_id": crawl_id,
+    }], task_id=task_id)
+
+    return CollectResModel(task_id=celery_task.id)
+
+
+@router.post("/sharded", response_model=CollectResModel)
+async def create_sharded_task(
+    channel_link: str,
+    shards: Optional[int] = None,
+    batch_size: Optional[int] = None,
+):
+    """
+    Запускает полный обход канала, разделённый на окна id сообщений между аккаунтами.
+
+    - **shards**: количество окон (по умолчанию — количество активных аккаунтов).
+    """
+    task_id = uuid()
+    task_registry.register(task_id, celery_crawl_sharded.name, channel_link)
+    celery_task = celery_crawl_sharded.apply_async(args=[{
+        "channel_link": channel_link,
+        "shards": shards,
+        "batch_size": batch_size,
+    }], task_id=task_id)
+
+    return CollectResModel(task_id=celery_task.id)
+
+
+@router.post("/chunked", response_model=CollectResModel)
+async def create_chunked_task(
+    channel_link: str,
+    chunk_size: Optional[int] = None,
+    batch_size: Optional[int] = None,
+):
+    """
+    Запускает полный обход канала частями фиксированного размера по id сообщений.
+
+    - **chunk_size**: количество id сообщений в одной части (по умолчанию CRAWL_CHUNK_SIZE).
+    """
+    task_id = uuid()
+    task_registry.register(task_id, celery_plan_crawl.name, channel_link)
+    celery_task = celery_plan_crawl.apply_async(args=[{
+        "channel_link": channel_link,
+        "chunk_size": chunk_size,
+        "batch_size": batch_size,
+    }], task_id=task_id)
+
+    return CollectResModel(task_id=celery_task.id)
+
+
+@router.post("/rescan", response_model=CollectResModel)
+async def create_rescan_task(
+    channel_link: str,
+    days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+):
+    """
+    Обновляет текст, медиа и реакции постов канала за последние дни.
+
+    Записываются только изменившиеся посты и комментарии, поэтому повторные
+    обновления не раздувают таблицы.
+
+    - **days**: глубина обновления в днях (по умолчанию RESCAN_DAYS).
+    """
+    task_id = uuid()
+    task_registry.register(task_id, celery_rescan.name, channel_link)
+    celery_task = celery_rescan.apply_async(args=[{
+        "channel_link": channel_link,
+        "days": days,
+        "batch_size": batch_size,
+    }], task_id=task_id)
+
+    return CollectResModel(task_id=celery_task.id)
+
+
+@router.post("/collect", response_model=CollectResModel)
+async def create_collect_task(tasks: CollectReqModel):
+    """
+    Собирает посты и комментарии по списку ссылок на сообщения (t.me/<channel>/<id>).
+
+    Ссылки одного канала собираются одним запросом get_messages на каждые 100 id.
+
+    - **limit**: максимальное количество комментариев к каждому посту.
+    - **asc**: собирать комментарии от старых к новым.
+    """
+    task_id = uuid()
+    task_registry.register(task_id, celery_collect.name)
+    celery_task = celery_collect.apply_async(args=[{
+        "urls": [item.url for item in tasks.data],
+        "limit": tasks.limit,
+        "asc": tasks.asc,
+    }], task_id=task_id)
+
+    return CollectResModel(task_id=celery_task.id)
+
+
+@router.post("/export", response_model=CollectResModel)
+async def create_export_task(
+    channel: str,
+    format: ExportFormat = ExportFormat.parquet,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """
+    Выгружает посты канала вместе с комментариями в файл в каталоге EXPORT_DIR.
+
+    - **format**: parquet (комментарии в соседнем файле *.comments.parquet, путь в comments_path),
+      jsonl (строка на пост, комментарии вложены списком) или xlsx (листы posts и comments).
+    - **since**, **until**: границы времени постов.
+
+    Путь к файлу возвращается в результате задачи, ход выгрузки — в /task/{task_id}/events.
+    """
+    task_id = uuid()
+    task_registry.register(task_id, celery_export.name, channel)
+    celery_task = celery_export.apply_async(args=[{
+        "channel": channel,
+        "format": format.value,
+        "since": since.isoformat() if since else None,
+        "until": until.isoformat() if until else None,
+    }], task_id=task_id)
 
     return CollectResModel(task_id=celery_task.id)
 
@@ -63,12 +256,18 @@ async def publish_saved_posts_endpoint(
 
     - **target_channel**: идентификатор или ссылка на канал, куда будут опубликованы посты.
     """
-    worker = Worker(post_repo=post_repo, account=account_repo.get_account(), comment_repo=comment_repo)
     try:
-        await worker.publish_saved_posts(
-            source_channel=source_channel,
-            target_channel=target_channel
+        async with account_leaser.lease(account_repo) as account:
+            worker = Worker(
+                post_repo=post_repo,
+                account=account,
+                comment_repo=comment_repo,
+                client=await client_pool.acquire(account)
             )
+            await worker.publish_saved_posts(
+                source_channel=source_channel,
+                target_channel=target_channel
+                )
         return {"message": "Posts published successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -81,11 +280,17 @@ async def subscribe_to_channel(
     account_repo: AccountRepository = Depends(get_account_repository),
     comment_repo: CommentRepository = Depends(get_comment_repository)
 ):
-    worker = Worker(post_repo=post_repo, account=account_repo.get_account(), comment_repo=comment_repo)
     try:
-        await worker.subscribe(
-            channel_username=channel_username,
+        async with account_leaser.lease(account_repo) as account:
+            worker = Worker(
+                post_repo=post_repo,
+                account=account,
+                comment_repo=comment_repo,
+                client=await client_pool.acquire(account)
             )
+            await worker.subscribe(
+                channel_username=channel_username,
+                )
         return {"message": f"Subscribed to {channel_username} successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
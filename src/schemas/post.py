@@ -0,0 +1,60 @@
+from datetime import datetime
+from typing import Dict, Optional, List
+from pydantic import BaseModel
+
+
+class PostModel(BaseModel):
+    post_id: int
+    channel_id: int
+    channel_name: Optional[str]
+    url: str
+    text: str
+    media: str
+    time: datetime
+    reactions: Optional[Dict[str, int]]
+    reactions_total: int = 0
+    replies_count: Optional[int]
+
+    class Config:
+        from_attributes = True
+
+
+class CommentModel(BaseModel):
+    id: int
+    channel_id: int
+    post_id: int
+    text: str
+    user_id: str
+    time: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class PostsPageModel(BaseModel):
+    posts: List[PostModel]
+    next_cursor: Optional[str] = None
+
+
+class CommentsPageModel(BaseModel):
+    comments: List[CommentModel]
+    next_cursor: Optional[str] = None
+
+
+class ChannelReactionsModel(BaseModel):
+    channel_id: int
+    reactions: Dict[str, int]
+    total: int
+
+
+class MetricsPointModel(BaseModel):
+    time: datetime
+    reactions: int
+    replies: int
+
+
+class MetricsSeriesModel(BaseModel):
+    channel_id: int
+    post_id: Optional[int] = None
+    step: int
+    points: List[MetricsPointModel]
@@ -7,10 +7,15 @@ class TaskGetReqModel(BaseModel):
     task_id: str
     task_status: str
     task_result: Optional[str]
+    progress: Optional[float] = None
+    name: Optional[str] = None
+    channel: Optional[str] = None
+    submitted_at: Optional[float] = None
 
 
 class AllTasksGetReqModel(BaseModel):
     tasks: List[TaskGetReqModel]
+    next_cursor: Optional[str] = None
 
 class TaskModel(BaseModel):
     id: str
@@ -0,0 +1,42 @@
+import time
+from typing import Awaitable, Callable
+
+
+class BatchWriter:
+    """
+    Буфер строк для пакетной записи в БД.
+
+    Накопленные строки передаются в flush-функцию, когда в буфере набирается
+    size строк или с момента последней записи прошло interval секунд.
+    При выходе из контекстного менеджера остаток буфера записывается всегда.
+    """
+
+    def __init__(self, flush: Callable[[list[dict]], Awaitable[None]], size: int, interval: float):
+        self._flush = flush
+        self.size = size
+        self.interval = interval
+        self.rows: list[dict] = []
+        self._last_flush = time.monotonic()
+
+    async def add(self, row: dict) -> None:
+        """
+        Добавляет строку в буфер и при необходимости сбрасывает его.
+        """
+        self.rows.append(row)
+        if len(self.rows) >= self.size or time.monotonic() - self._last_flush >= self.interval:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Записывает накопленные строки и очищает буфер.
+        """
+        rows, self.rows = self.rows, []
+        self._last_flush = time.monotonic()
+        if rows:
+            await self._flush(rows)
+
+    async def __aenter__(self) -> "BatchWriter":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.flush()
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from typing import Callable, Coroutine
+
+logger = logging.getLogger(__name__)
+
+
+class TaskPool:
+    """
+    Пул фоновых корутин с ограничением числа одновременно выполняемых задач.
+
+    submit() не ждёт завершения корутины, поэтому вызывающий код продолжает работу.
+    Он притормаживает только когда задач в очереди и в работе становится больше max_pending.
+
+    Ошибки отдельных задач логируются, учитываются в failed и не прерывают остальные.
+    Исключения типов fatal (например, FloodWait аккаунта) запоминаются и пробрасываются
+    из следующего submit() или join(), чтобы вызывающий код мог повторить работу.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        max_pending: int | None = None,
+        fatal: tuple[type[BaseException], ...] = (),
+        on_failure: Callable[[BaseException], None] | None = None
+    ):
+        self._running = asyncio.Semaphore(limit)
+        self._pending = asyncio.Semaphore(max_pending or limit * 4)
+        self._tasks: set[asyncio.Task] = set()
+        self._fatal_types = fatal
+        self._fatal: BaseException | None = None
+        self.on_failure = on_failure
+        self.failed = 0
+
+    async def submit(self, coro: Coroutine) -> None:
+        """
+        Ставит корутину в очередь на выполнение.
+        """
+        try:
+            self._raise_fatal()
+        except BaseException:
+            coro.close()
+            raise
+        await self._pending.acquire()
+        task = asyncio.create_task(self._run(coro))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, coro: Coroutine) -> None:
+        try:
+            async with self._running:
+                await coro
+        except asyncio.CancelledError:
+            coro.close()
+            raise
+        except Exception as e:
+            if isinstance(e, self._fatal_types):
+                self._fatal = self._fatal or e
+                return
+            self.failed += 1
+            logger.error(f"Ошибка фоновой задачи: {e!r}")
+            if self.on_failure:
+                self.on_failure(e)
+        finally:
+            self._pending.release()
+
+    def _raise_fatal(self) -> None:
+        if self._fatal is not None:
+            error, self._fatal = self._fatal, None
+            raise error
+
+    async def _wait(self) -> None:
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def join(self) -> None:
+        """
+        Ожидает завершения всех поставленных задач и пробрасывает фатальную ошибку, если она была.
+        """
+        await self._wait()
+        self._raise_fatal()
+
+    async def cancel(self) -> None:
+        """
+        Отменяет все незавершённые задачи.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await self._wait()
@@ -1,4 +1,8 @@
+import base64
+import hashlib
 import inspect
+import json
+from datetime import datetime, timedelta, timezone
 from typing import Type
 
 from fastapi import Form
@@ -13,6 +17,103 @@ def explode_link(link: str) -> dict[str, str]:
         "message_id": message_id
     }
 
+def encode_cursor(time: datetime, *ids: int) -> str:
+    """
+    Кодирует ключ (time, *ids) последней строки страницы в непрозрачный курсор.
+    """
+    return base64.urlsafe_b64encode("|".join([time.isoformat(), *map(str, ids)]).encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int) -> tuple:
+    """
+    Декодирует курсор из encode_cursor с ключом из size полей.
+    Бросает ValueError, если курсор повреждён.
+    """
+    try:
+        time, *ids = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        if len(ids) != size - 1:
+            raise ValueError(cursor)
+        return datetime.fromisoformat(time), *map(int, ids)
+    except Exception as e:
+        raise ValueError(f"Некорректный курсор: {cursor}") from e
+
+
+def group_links_by_channel(links: list[str]) -> dict[str, list[int]]:
+    """
+    Группирует ссылки на сообщения вида t.me/<channel>/<id> по каналам без повторов id.
+    """
+    channels: dict[str, list[int]] = {}
+    for link in links:
+        parts = explode_link(link)
+        ids = channels.setdefault(parts["channel_name"], [])
+        message_id = int(parts["message_id"])
+        if message_id not in ids:
+            ids.append(message_id)
+    return channels
+
+
+def split_id_range(last_id: int, parts: int) -> list[tuple[int, int]]:
+    """
+    Делит диапазон id сообщений (0, last_id] на parts непересекающихся окон (min_id, max_id].
+    """
+    size = max(-(-last_id // max(parts, 1)), 1)
+    return [(low, min(low + size, last_id)) for low in range(0, last_id, size)]
+
+
+def chunk_id_range(last_id: int, size: int) -> list[tuple[int, int]]:
+    """
+    Делит диапазон id сообщений (0, last_id] на окна (min_id, max_id] по size id, от новых к старым.
+    """
+    return [(max(high - size, 0), high) for high in range(last_id, 0, -size)]
+
+
+def content_hash(*values) -> int:
+    """
+    Возвращает 64-битный отпечаток изменяемых полей строки (текст, медиа, реакции).
+    По нему повторная запись пропускает строки, которые не изменились.
+    """
+    payload = json.dumps(values, ensure_ascii=False, sort_keys=True, default=str).encode()
+    return int.from_bytes(hashlib.blake2b(payload, digest_size=8).digest(), "big", signed=True)
+
+
+def comment_to_row(comment, channel_id: int, post_id: int) -> dict:
+    """
+    Преобразует комментарий Telethon в строку для CommentRepository.create_comments.
+    """
+    try:
+        user_id = str(comment.from_id.user_id)
+    except AttributeError:
+        user_id = f'channel_id:{comment.peer_id.channel_id}'
+
+    return {
+        "id": comment.id,
+        "channel_id": channel_id,
+        "post_id": post_id,
+        "text": comment.text,
+        "user_id": user_id,
+        "time": comment.date,
+        "content_hash": content_hash(comment.text)
+    }
+
+
+def comments_min_id(message, state: tuple[int | None, int | None] | None) -> int | None:
+    """
+    Возвращает min_id для догрузки комментариев к посту.
+
+    None означает, что у поста нет комментариев или они не изменились
+    с прошлой синхронизации, и запрашивать их не нужно.
+    """
+    replies = message.replies
+    if not replies or not replies.replies:
+        return None
+
+    replies_count, replies_max_id = state or (None, None)
+    if (replies_count, replies_max_id) == (replies.replies, replies.max_id):
+        return None
+
+    return replies_max_id or 0
+
+
 def as_form(cls: Type[BaseModel]):
     new_parameters = []
 
@@ -38,18 +139,76 @@ def as_form(cls: Type[BaseModel]):
     return cls
 
 
-def process_reactions(reactions: list[tuple]) -> str:
-    # Инициализируем счетчики положительных и отрицательных реакций
-    positive_reactions_count = 0
-    negative_reactions_count = 0
+def message_reactions(message) -> dict[str, int]:
+    """
+    Возвращает реакции сообщения Telethon как {эмодзи: количество}.
+    Пользовательские эмодзи и платные реакции (без emoticon) пропускаются.
+    """
+    results = message.reactions.results if message and message.reactions else []
+    reactions: dict[str, int] = {}
+    for item in results:
+        emoticon = getattr(item.reaction, "emoticon", None)
+        if emoticon:
+            reactions[emoticon] = reactions.get(emoticon, 0) + item.count
+    return reactions
+
+
+def media_file_id(message) -> int | None:
+    """
+    Возвращает id фото или документа сообщения; при замене медиа он меняется.
+    """
+    file = getattr(message, "photo", None) or getattr(message, "document", None)
+    return getattr(file, "id", None)
+
+
+def message_metrics(message) -> list[int]:
+    """
+    Возвращает метрики сообщения в порядке METRICS: реакции и комментарии.
+    """
+    return [
+        sum(message_reactions(message).values()),
+        message.replies.replies if message.replies else 0,
+    ]
+
+
+def as_utc_naive(time: datetime) -> datetime:
+    """
+    Приводит время к UTC без часового пояса, как оно хранится в колонках timestamp.
+    """
+    if time.tzinfo is not None:
+        time = time.astimezone(timezone.utc).replace(tzinfo=None)
+    return time
+
 
-    for emoji, count in reactions:
-        if emoji in ['👍', '❤️', '🔥', '🎉', '🤩', '😁', '🥰', '👏']:
-            positive_reactions_count += count
+def resample_metrics(
+    points: list[tuple[int, datetime, list[int]]],
+    start: datetime,
+    end: datetime,
+    step: timedelta
+) -> list[tuple[datetime, list[int]]]:
+    """
+    Пересчитывает снимки метрик в ряд с шагом step от start до end включительно.
 
-        elif emoji in ['👎', '😱', '😢', '💩', '🤮', '🤯', '🤔', '🤬']:
-            negative_reactions_count += count
+    Значение поста в точке ряда — его последний снимок не позже этой точки; значения
+    нескольких постов суммируются. Посты без снимков к этому моменту дают 0.
 
+    :param points: Снимки (post_id, time, metrics), см. PostMetricsRepository.get_points.
+    """
+    points = sorted(points, key=lambda point: point[1])
+    width = len(points[0][2]) if points else 0
+    current: dict[int, list[int]] = {}
+    totals = [0] * width
+    series = []
 
-    # Обновляем поле reaction для текущей записи
-    return f"{positive_reactions_count}:{negative_reactions_count}"
+    index = 0
+    time = start
+    while time <= end:
+        while index < len(points) and points[index][1] <= time:
+            post_id, _, metrics = points[index]
+            previous = current.get(post_id, [0] * width)
+            totals = [total + value - old for total, value, old in zip(totals, metrics, previous)]
+            current[post_id] = metrics
+            index += 1
+        series.append((time, list(totals)))
+        time += step
+    return series
@@ -0,0 +1,20 @@
+import os
+
+# Config читает обязательные настройки из окружения уже при импорте модулей;
+# модульные тесты не подключаются ни к Redis, ни к Postgres, ни к Telegram
+for name, value in {
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "SESSIONS_DIR": "/tmp",
+    "MEDIA_DIR": "/tmp",
+    "API_ID": "1",
+    "API_HASH": "hash",
+    "API_PORT": "8000",
+    "LOG_LEVEL": "INFO",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_DB": "db",
+    "POSTGRES_USER": "user",
+    "POSTGRES_PASSWORD": "password",
+}.items():
+    os.environ.setdefault(name, value)
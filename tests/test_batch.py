@@ -0,0 +1,55 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.utils import batch as batch_module
+from src.utils.batch import BatchWriter
+
+
+class Recorder:
+    def __init__(self):
+        self.batches: list[list[dict]] = []
+
+    async def __call__(self, rows: list[dict]) -> None:
+        self.batches.append(rows)
+
+
+def test_batch_writer_flushes_full_batches_and_remainder():
+    recorder = Recorder()
+
+    async def write():
+        async with BatchWriter(recorder, size=2, interval=3600) as batch:
+            for number in range(5):
+                await batch.add({"id": number})
+
+    asyncio.run(write())
+    assert [[row["id"] for row in rows] for rows in recorder.batches] == [[0, 1], [2, 3], [4]]
+
+
+def test_batch_writer_flushes_after_interval(monkeypatch):
+    recorder = Recorder()
+    now = [100.0]
+    # Подменяется модуль time только внутри batch, а не часы цикла событий
+    monkeypatch.setattr(batch_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+
+    async def write():
+        batch = BatchWriter(recorder, size=100, interval=5)
+        await batch.add({"id": 1})
+        now[0] += 5
+        await batch.add({"id": 2})
+        await batch.add({"id": 3})
+        return batch
+
+    batch = asyncio.run(write())
+    assert recorder.batches == [[{"id": 1}, {"id": 2}]]
+    assert batch.rows == [{"id": 3}]
+
+
+def test_batch_writer_skips_empty_flush():
+    recorder = Recorder()
+
+    async def write():
+        async with BatchWriter(recorder, size=10, interval=3600):
+            pass
+
+    asyncio.run(write())
+    assert recorder.batches == []
@@ -0,0 +1,27 @@
+import pytest
+from pydantic import ValidationError
+
+from src.core.config import Config
+
+
+def test_default_pool_fits_process_share_of_connections():
+    config = Config()
+    assert config.db_connection_budget == (config.DB_MAX_CONNECTIONS - config.DB_RESERVED_CONNECTIONS) // config.DB_PROCESSES
+    assert config.db_pool_size == config.TASKS_PER_PROCESS
+    assert config.db_pool_size + config.db_max_overflow <= config.db_connection_budget
+
+
+def test_derived_pool_is_capped_by_process_share():
+    config = Config(DB_MAX_CONNECTIONS=100, DB_PROCESSES=3, DB_RESERVED_CONNECTIONS=10)
+    assert config.db_connection_budget == 30
+    assert (config.db_pool_size, config.db_max_overflow) == (30, 0)
+
+
+def test_overflow_covers_comment_sessions_when_share_allows():
+    config = Config(TASKS_PER_PROCESS=8, COMMENTS_PROCESS_CONCURRENCY=4)
+    assert (config.db_pool_size, config.db_max_overflow) == (8, 4)
+
+
+def test_explicit_pool_larger_than_share_is_rejected():
+    with pytest.raises(ValidationError):
+        Config(DB_POOL_SIZE=80, DB_MAX_OVERFLOW=30)
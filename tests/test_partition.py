@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta, timezone
+
+from src.core.config import Config
+from src.repositories import partition
+from src.repositories.partition import PartitionRepository, month_start, retention_cutoff, shift_month
+
+
+def test_month_start_normalizes_to_naive_utc():
+    moscow = timezone(timedelta(hours=3))
+    assert month_start(datetime(2025, 3, 1, 1, 30, tzinfo=moscow)) == datetime(2025, 2, 1)
+    assert month_start(datetime(2025, 3, 17, 23, 59)) == datetime(2025, 3, 1)
+
+
+def test_shift_month_crosses_years():
+    assert shift_month(datetime(2025, 1, 1), -1) == datetime(2024, 12, 1)
+    assert shift_month(datetime(2024, 11, 1), 3) == datetime(2025, 2, 1)
+    assert shift_month(datetime(2025, 3, 1), -27) == datetime(2022, 12, 1)
+
+
+def test_months_include_neighbours_near_boundaries():
+    assert PartitionRepository._months([datetime(2025, 3, 15)]) == {datetime(2025, 3, 1)}
+    assert PartitionRepository._months([datetime(2025, 3, 31, 12)]) == {datetime(2025, 3, 1), datetime(2025, 4, 1)}
+    assert PartitionRepository._months([datetime(2025, 3, 1, 6)]) == {datetime(2025, 2, 1), datetime(2025, 3, 1)}
+
+
+def test_retention_cutoff(monkeypatch):
+    now = datetime(2025, 3, 20, tzinfo=timezone.utc)
+
+    monkeypatch.setattr(partition, "Config", lambda: Config(RETENTION_MONTHS=0))
+    assert retention_cutoff(now) is None
+
+    monkeypatch.setattr(partition, "Config", lambda: Config(RETENTION_MONTHS=12))
+    assert retention_cutoff(now) == datetime(2024, 3, 1)
@@ -0,0 +1,149 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.core import task_registry as registry_module
+from src.core.task_registry import TaskRegistry
+
+
+def encode(value) -> bytes:
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self) -> list:
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class FakeRedis:
+    """
+    Команды Redis, которые использует TaskRegistry, поверх словарей.
+    """
+
+    def __init__(self):
+        self.hashes: dict[str, dict[str, bytes]] = {}
+        self.zsets: dict[str, dict[bytes, float]] = {}
+        self.sets: dict[str, set[bytes]] = {}
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update({field: encode(value) for field, value in mapping.items()})
+
+    def expire(self, key, seconds):
+        pass
+
+    def hmget(self, key, *fields):
+        values = self.hashes.get(key)
+        return [values.get(field) if values else None for field in fields]
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update({encode(member): score for member, score in mapping.items()})
+
+    def zrem(self, key, *members):
+        for member in members:
+            self.zsets.get(key, {}).pop(encode(member), None)
+
+    def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    def zremrangebyscore(self, key, low, high):
+        zset = self.zsets.get(key, {})
+        for member in [member for member, score in zset.items() if score <= high]:
+            del zset[member]
+        if not zset:
+            self.zsets.pop(key, None)
+
+    def zrangebyscore(self, key, low, high):
+        return sorted(member for member, score in self.zsets.get(key, {}).items() if low <= score <= high)
+
+    def zrevrangebyscore(self, key, high, low, start, num, withscores):
+        entries = sorted(
+            ((score, member) for member, score in self.zsets.get(key, {}).items() if score <= float(high)),
+            reverse=True
+        )
+        return [(member, score) for score, member in entries[start:start + num]]
+
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(encode(member) for member in members)
+
+    def srem(self, key, *members):
+        self.sets.get(key, set()).difference_update(encode(member) for member in members)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(registry_module, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def registry(clock):
+    return TaskRegistry(FakeRedis(), ttl=100)
+
+
+def read_all(registry: TaskRegistry, limit: int, **filters) -> list[str]:
+    seen, cursor = [], None
+    while True:
+        tasks, cursor = registry.page(limit, cursor, **filters)
+        seen += [task["task_id"] for task in tasks]
+        if cursor is None or not tasks:
+            return seen
+
+
+def test_page_keeps_tasks_with_equal_scores(registry):
+    # Все задачи поставлены в один момент: курсор по одному времени терял бы их на границах страниц
+    for number in range(11):
+        registry.register(f"task-{number:02d}", "name")
+
+    assert read_all(registry, 3) == [f"task-{number:02d}" for number in reversed(range(11))]
+
+
+def test_page_orders_by_time_and_filters_by_channel(registry, clock):
+    for number in range(6):
+        clock[0] += 1
+        registry.register(f"task-{number}", "name", "channel" if number % 2 else None)
+
+    assert read_all(registry, 4) == [f"task-{number}" for number in reversed(range(6))]
+    assert read_all(registry, 2, channel="channel") == ["task-5", "task-3", "task-1"]
+
+
+def test_page_skips_and_removes_expired_tasks(registry):
+    for number in range(5):
+        registry.register(f"task-{number}", "name")
+    del registry.redis.hashes["task:task-3"]
+
+    tasks, cursor = registry.page(3, registry.encode_cursor(1000.0, "task-4"))
+    assert [task["task_id"] for task in tasks] == ["task-2", "task-1", "task-0"]
+    assert b"task-3" not in registry.redis.zsets["tasks"]
+
+
+def test_page_rejects_damaged_cursor(registry):
+    for cursor in ("1000.0", "abc:task", ":task"):
+        with pytest.raises(ValueError):
+            registry.page(3, cursor)
+
+
+def test_register_prunes_every_index_by_ttl(registry, clock):
+    registry.register("old", "name", "old-channel")
+    registry.set_status("old", "SUCCESS")
+
+    clock[0] += 200
+    registry.register("new", "name", "new-channel")
+
+    redis = registry.redis
+    assert set(redis.zsets) == {"tasks", "tasks:status:PENDING", "tasks:channel:new-channel"}
+    assert redis.zsets["tasks"] == {b"new": clock[0]}
+    assert redis.smembers(TaskRegistry.INDEXES) == {b"tasks:status:PENDING", b"tasks:channel:new-channel"}
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils.utils import (
+    chunk_id_range, comments_min_id, decode_cursor, encode_cursor, resample_metrics, split_id_range
+)
+
+
+def message(replies: int | None, max_id: int | None = None):
+    return SimpleNamespace(replies=SimpleNamespace(replies=replies, max_id=max_id) if replies is not None else None)
+
+
+def test_comments_min_id_skips_posts_without_comments():
+    assert comments_min_id(message(None), None) is None
+    assert comments_min_id(message(0), None) is None
+
+
+def test_comments_min_id_fetches_new_thread_from_start():
+    assert comments_min_id(message(5, 120), None) == 0
+    assert comments_min_id(message(5, 120), (None, None)) == 0
+
+
+def test_comments_min_id_skips_unchanged_thread():
+    assert comments_min_id(message(5, 120), (5, 120)) is None
+
+
+def test_comments_min_id_continues_from_saved_max_id():
+    assert comments_min_id(message(7, 140), (5, 120)) == 120
+    # Удалённые комментарии меняют только количество, догрузка идёт с того же места
+    assert comments_min_id(message(4, 120), (5, 120)) == 120
+
+
+def covered(windows: list[tuple[int, int]]) -> list[int]:
+    return sorted(message_id for low, high in windows for message_id in range(low + 1, high + 1))
+
+
+def test_split_id_range_covers_range_without_overlap():
+    windows = split_id_range(1000, 3)
+    assert len(windows) == 3
+    assert covered(windows) == list(range(1, 1001))
+
+
+def test_split_id_range_never_makes_more_windows_than_ids():
+    assert split_id_range(2, 5) == [(0, 1), (1, 2)]
+    assert split_id_range(0, 4) == []
+    assert split_id_range(10, 0) == [(0, 10)]
+
+
+def test_chunk_id_range_goes_from_newest_to_oldest():
+    assert chunk_id_range(25, 10) == [(15, 25), (5, 15), (0, 5)]
+    assert covered(chunk_id_range(1001, 100)) == list(range(1, 1002))
+    assert chunk_id_range(0, 10) == []
+
+
+def test_cursor_round_trip():
+    time = datetime(2025, 3, 1, 12, 30, 15, 250)
+    assert decode_cursor(encode_cursor(time, -1001234567890, 42), 3) == (time, -1001234567890, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", encode_cursor(datetime(2025, 1, 1), 1)])
+def test_decode_cursor_rejects_damaged_or_foreign_cursors(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 3)
+
+
+def test_resample_metrics_holds_last_snapshot_and_sums_posts():
+    start = datetime(2025, 3, 1)
+    hour = timedelta(hours=1)
+    points = [
+        (2, start + 90 * timedelta(minutes=1), [5, 1]),
+        (1, start - hour, [3, 0]),
+        (1, start + hour, [4, 2]),
+    ]
+    assert resample_metrics(points, start, start + 2 * hour, hour) == [
+        (start, [3, 0]),
+        (start + hour, [4, 2]),
+        (start + 2 * hour, [9, 3]),
+    ]
+
+
+def test_resample_metrics_without_snapshots_is_empty_series():
+    start = datetime(2025, 3, 1)
+    series = resample_metrics([], start, start + timedelta(hours=1), timedelta(minutes=30))
+    assert [time for time, _ in series] == [start + timedelta(minutes=30) * step for step in range(3)]
+    assert all(values == [] for _, values in series)